@@ -88,7 +88,7 @@ class CardEngine:
     def update_card(self, card_id: str, **fields: object) -> Card:
         card = self._get(card_id)
         for key, value in fields.items():
-            if not hasattr(card, key):
+            if key.startswith("_") or not hasattr(card, key):
                 raise ValueError(f"Card has no field '{key}'")
             if key in ("status", "previous_phase") and isinstance(value, str):
                 value = CardStatus(value)
@@ -15,7 +15,7 @@ class CardStatus(Enum):
     DONE = "done"
 
 
-@dataclass
+@dataclass(slots=True)
 class CardPhaseEntry:
     """A single phase-transition record in a card's history."""
 
@@ -25,7 +25,7 @@ class CardPhaseEntry:
     timestamp: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Card:
     """A Kanban task card that moves through discussion phases."""
 
@@ -41,6 +41,13 @@ class Card:
     previous_phase: CardStatus | None
     history: list[CardPhaseEntry] = field(default_factory=list)
     created_at: str = ""
+    # Memoized to_dict() keyed by history length; any field assignment clears it.
+    _dict_cache: tuple[int, dict] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if name != "_dict_cache":
+            object.__setattr__(self, "_dict_cache", None)
+        object.__setattr__(self, name, value)
 
     @staticmethod
     def _status_str(val: CardStatus | str | None) -> str | None:
@@ -49,8 +56,15 @@ class Card:
         return val.value if isinstance(val, CardStatus) else str(val)
 
     def to_dict(self) -> dict:
-        """Serialize the card for JSON / WebSocket transport."""
-        return {
+        """Serialize the card for JSON / WebSocket transport.
+
+        The result is cached until the card changes, so callers must treat it
+        as read-only.
+        """
+        cached = self._dict_cache
+        if cached is not None and cached[0] == len(self.history):
+            return cached[1]
+        data = {
             "id": self.id,
             "title": self.title,
             "description": self.description,
@@ -72,3 +86,5 @@ class Card:
             ],
             "created_at": self.created_at,
         }
+        self._dict_cache = (len(self.history), data)
+        return data
@@ -5,25 +5,25 @@ from dataclasses import dataclass
 from ..agents.base import AgentResponse
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatEvent:
     """Base class for chat events."""
 
 
-@dataclass
+@dataclass(slots=True)
 class RoundStarted(ChatEvent):
     round_number: int
     agents: list[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentStreamChunk(ChatEvent):
     agent_name: str
     round_number: int
     text: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentCompleted(ChatEvent):
     agent_name: str
     round_number: int
@@ -32,7 +32,7 @@ class AgentCompleted(ChatEvent):
     stopped: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentInterrupted(ChatEvent):
     """Fired when an agent is stopped for a DM restart."""
     agent_name: str
@@ -40,21 +40,21 @@ class AgentInterrupted(ChatEvent):
     partial_text: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentStderr(ChatEvent):
     agent_name: str
     round_number: int
     text: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentNotice(ChatEvent):
     """Visible system notice about an agent (e.g. session reset)."""
     agent_name: str
     message: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentPromptAssembled(ChatEvent):
     """Fired before dispatching prompt to an agent, for UI visibility."""
     agent_name: str
@@ -62,7 +62,7 @@ class AgentPromptAssembled(ChatEvent):
     sections: dict[str, str]  # system, memory, cards, round_delta
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentDeliveryAcked(ChatEvent):
     """Fired when an agent dequeues a delivered inbox message."""
     delivery_id: str
@@ -71,24 +71,24 @@ class AgentDeliveryAcked(ChatEvent):
     round_number: int | None
 
 
-@dataclass
+@dataclass(slots=True)
 class RoundEnded(ChatEvent):
     round_number: int
     all_passed: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class RoundPaused(ChatEvent):
     """Fired after a round where any agent was stopped, before next round."""
     round_number: int
 
 
-@dataclass
+@dataclass(slots=True)
 class DiscussionEnded(ChatEvent):
     reason: str  # "all_passed" | "paused" | "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentPermissionRequested(ChatEvent):
     """Agent waiting for user tool approval."""
     agent_name: str
@@ -99,6 +99,6 @@ class AgentPermissionRequested(ChatEvent):
     description: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class UserMessageReceived(ChatEvent):
     text: str
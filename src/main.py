@@ -14,7 +14,25 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("-t", "--timeout", type=float, default=1800.0, help="Idle timeout per agent in seconds (default: 1800)")
     parser.add_argument("--parse-timeout", type=float, default=1200.0, help="Timeout for parsing agent output in seconds (default: 1200)")
     parser.add_argument("--send-timeout", type=float, default=120.0, help="WebSocket send timeout in seconds (default: 120)")
+    parser.add_argument(
+        "--stream-coalesce-ms",
+        type=float,
+        default=15.0,
+        help="Merge agent stream chunks arriving within this window into one frame (0 = off, default: 15)",
+    )
     parser.add_argument("--hard-timeout", type=float, default=0, help="Hard timeout per agent in seconds (0 = disabled, default: 0)")
+    parser.add_argument(
+        "--no-ws-deflate",
+        dest="ws_deflate",
+        action="store_false",
+        help="Disable permessage-deflate compression of WebSocket frames (enabled by default)",
+    )
+    parser.add_argument(
+        "--loop",
+        choices=("auto", "uvloop", "asyncio"),
+        default="auto",
+        help="Event loop implementation (default: auto = uvloop when installed)",
+    )
     parser.add_argument("--host", default="127.0.0.1", help="Host (default: 127.0.0.1)")
     parser.add_argument("--port", type=int, default=8421, help="Port (default: 8421)")
 
@@ -35,6 +53,24 @@ def _get_local_ip() -> str | None:
         return None
 
 
+def _select_event_loop(preference: str = "auto") -> str:
+    """Prefer uvloop (shipped with uvicorn[standard]) and fall back to asyncio.
+
+    ``--loop asyncio`` opts out (e.g. on Windows, where uvloop is unavailable);
+    ``--loop uvloop`` makes a missing install a startup error instead of a
+    silent fallback.
+    """
+    if preference == "asyncio":
+        return "asyncio"
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        if preference == "uvloop":
+            raise SystemExit("--loop uvloop requested but uvloop is not installed")
+        return "asyncio"
+    return "uvloop"
+
+
 def main():
     args = build_parser().parse_args()
     log = logging.getLogger("multiagents")
@@ -65,21 +101,34 @@ def main():
         parse_timeout=args.parse_timeout,
         send_timeout=args.send_timeout,
         hard_timeout=args.hard_timeout or None,
+        stream_coalesce_ms=args.stream_coalesce_ms,
     )
     print(f"  Local:   http://localhost:{args.port}")
     lan_ip = _get_local_ip()
     if lan_ip and args.host != "127.0.0.1":
         print(f"  Network: http://{lan_ip}:{args.port}")
     print()
+    loop = _select_event_loop(args.loop)
     log.info(
-        "starting multiagents — agents=%s timeout=%.0fs parse_timeout=%.0fs send_timeout=%.0fs hard_timeout=%.0fs",
+        "starting multiagents — agents=%s timeout=%.0fs parse_timeout=%.0fs send_timeout=%.0fs hard_timeout=%.0fs "
+        "loop=%s ws_deflate=%s",
         args.agents,
         args.timeout,
         args.parse_timeout,
         args.send_timeout,
         args.hard_timeout,
+        loop,
+        args.ws_deflate,
+    )
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+        log_config=None,
+        loop=loop,
+        ws_per_message_deflate=args.ws_deflate,
     )
-    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", log_config=None)
 
 
 if __name__ == "__main__":
@@ -1,21 +1,35 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import functools
 import logging
 import os
 import time
+from collections.abc import Awaitable, Callable
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import orjson
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from datetime import datetime, timezone
 
 from fastapi.responses import FileResponse, JSONResponse, Response
 
-from .runner import SessionRunner
+from ..memory.manager import MemoryManager
+from .outbox import Outbox
+from .runner import SessionRunner, run_blocking, run_store_call
 from .sessions import SessionStore
 from .settings import SettingsStore
+from .wire import (
+    MSGPACK_SUBPROTOCOL,
+    decode_json,
+    decode_msgpack,
+    encode_json,
+    encode_msgpack,
+    negotiate_subprotocol,
+)
 
 log = logging.getLogger("multiagents")
 
@@ -49,7 +63,10 @@ _REQUIRED_FIELDS: dict[str, list[str]] = {
 # Rate limiting: max messages per window
 _RATE_LIMIT_WINDOW = 10.0  # seconds
 _RATE_LIMIT_MAX = 100  # messages per window
+_MAX_PENDING_COMMANDS = 100  # parsed messages waiting for their handler
 _SUPPORTED_AGENT_TYPES = frozenset({"claude", "codex", "kimi"})
+# Envelope keys of a card_update message that are not card fields
+_CARD_UPDATE_SKIP = frozenset({"type", "card_id"})
 
 
 def _validate_ws_message(msg: dict) -> str | None:
@@ -67,11 +84,87 @@ def _validate_ws_message(msg: dict) -> str | None:
             return f"Missing required field '{field}' for {msg_type}"
     return None
 
-_DEFAULT_AGENTS = [
-    {"name": "claude", "type": "claude", "role": "", "model": None},
-    {"name": "codex", "type": "codex", "role": "", "model": None},
-    {"name": "kimi", "type": "kimi", "role": "", "model": None},
-]
+# Immutable so every app instance can share it without defensive copies.
+_DEFAULT_AGENTS = tuple(
+    MappingProxyType({"name": name, "type": name, "role": "", "model": None})
+    for name in ("claude", "codex", "kimi")
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _norm_wd(working_dir: str) -> str:
+    """Expand and resolve a session working directory (memoized per raw string)."""
+    return str(Path(working_dir).expanduser().resolve())
+
+
+@dataclass(slots=True)
+class _WsConnection:
+    """Per-socket state shared by the WebSocket message handlers."""
+
+    outbox: Outbox
+    session_id: str | None = None
+
+
+_WsHandler = Callable[[_WsConnection, dict], Awaitable[None]]
+
+
+def _requires_session(handler: _WsHandler) -> _WsHandler:
+    """Reply ``No session`` instead of running *handler* before create/join."""
+    @functools.wraps(handler)
+    async def wrapper(conn: _WsConnection, msg: dict) -> None:
+        if not conn.session_id:
+            conn.outbox.send_nowait({"type": "error", "message": "No session"})
+            return
+        await handler(conn, msg)
+    return wrapper
+
+
+def _requires_card(handler: _WsHandler) -> _WsHandler:
+    """Like :func:`_requires_session`, and also insist on a non-empty ``card_id``."""
+    @_requires_session
+    @functools.wraps(handler)
+    async def wrapper(conn: _WsConnection, msg: dict) -> None:
+        if not msg.get("card_id"):
+            conn.outbox.send_nowait({"type": "error", "message": "Missing card_id"})
+            return
+        await handler(conn, msg)
+    return wrapper
+
+
+_IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def _build_static_index(static_dir: str) -> dict[str, tuple[str, os.stat_result, str]]:
+    """Map URL paths under *static_dir* to ``(file path, stat, ETag)``."""
+    index: dict[str, tuple[str, os.stat_result, str]] = {}
+    for root, _dirs, files in os.walk(static_dir):
+        for name in files:
+            file_path = os.path.join(root, name)
+            st = os.stat(file_path)
+            rel = os.path.relpath(file_path, static_dir).replace(os.sep, "/")
+            index[rel] = (file_path, st, f'"{st.st_mtime_ns:x}-{st.st_size:x}"')
+    return index
+
+
+async def _run_ws_commands(conn: _WsConnection, commands: asyncio.Queue[tuple[_WsHandler, dict] | None]) -> None:
+    """Run one connection's message handlers sequentially until the ``None`` sentinel."""
+    while (item := await commands.get()) is not None:
+        handler, msg = item
+        try:
+            await handler(conn, msg)
+        except Exception:
+            log.exception("ws handler failed type=%s", msg.get("type"))
+            conn.outbox.send_nowait({"type": "error", "message": "Internal error"})
+
+
+async def _iter_frames(ws: WebSocket):
+    """Yield text or binary frame payloads until the client disconnects."""
+    while True:
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        data = message.get("bytes")
+        yield data if data is not None else message.get("text") or ""
 
 
 def create_app(
@@ -82,15 +175,17 @@ def create_app(
     hard_timeout: float | None = None,
     warmup_ttl: float = 300.0,
     ack_ttl: float = 300.0,
+    stream_coalesce_ms: float = 15.0,
     session_store: SessionStore | None = None,
     settings_store: SettingsStore | None = None,
 ) -> FastAPI:
     store = session_store or SessionStore()
     settings = settings_store or SettingsStore(store.db_path)
-    agents_list = list(default_agents or _DEFAULT_AGENTS)
     # Normalize to persona dicts if strings
-    if agents_list and isinstance(agents_list[0], str):
-        agents_list = [{"name": a, "type": a, "role": "", "model": None} for a in agents_list]
+    agents_list = [
+        {"name": a, "type": a, "role": "", "model": None} if isinstance(a, str) else dict(a)
+        for a in (default_agents or _DEFAULT_AGENTS)
+    ]
     runner = SessionRunner(
         store=store,
         timeout=timeout,
@@ -100,10 +195,11 @@ def create_app(
         warmup_ttl=warmup_ttl,
         ack_ttl=ack_ttl,
         settings_store=settings,
+        stream_coalesce_ms=stream_coalesce_ms,
     )
 
     async def _store_call(fn, *args, **kwargs):
-        return await asyncio.to_thread(fn, *args, **kwargs)
+        return await run_store_call(fn, *args, **kwargs)
 
     def _agents_with_models(spec: list[str] | list[dict]) -> list[dict]:
         """Normalize agent specs and attach configured model when not explicitly set."""
@@ -126,6 +222,21 @@ def create_app(
             })
         return normalized
 
+    # The ``connected`` hello only changes when agent model settings change, so
+    # serialize it once per wire format and reuse it for every new connection.
+    hello_frames: dict[bool, str | bytes] = {}
+
+    def _connected_frame(binary: bool) -> str | bytes:
+        frame = hello_frames.get(binary)
+        if frame is None:
+            hello = {"type": "connected", "agents": _agents_with_models(agents_list)}
+            frame = encode_msgpack(hello) if binary else encode_json(hello)
+            hello_frames[binary] = frame
+        return frame
+
+    def _invalidate_connected_frame() -> None:
+        hello_frames.clear()
+
     def _validate_session_config(config: dict | None) -> str | None:
         if config is None:
             return None
@@ -180,10 +291,7 @@ def create_app(
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
-        """Finalize any unprocessed transcripts from previous runs."""
-        from pathlib import Path
-        from ..memory.manager import MemoryManager
-
+        """Finalize any unprocessed transcripts from previous runs; flush queued events on shutdown."""
         sessions = await _store_call(store.list_sessions)
         for sess in sessions:
             full = await _store_call(store.get_session, sess["id"])
@@ -198,10 +306,11 @@ def create_app(
                 if pending:
                     log.info("recovering %d pending transcripts for %s", len(pending), wd)
                     for p in pending:
-                        await asyncio.to_thread(mgr.finalize_session, p.stem)
+                        await run_blocking(mgr.finalize_session, p.stem)
             except Exception:
                 log.debug("memory recovery failed for %s", wd, exc_info=True)
         yield
+        await runner.flush_event_writes()
 
     app = FastAPI(title="Multiagents", lifespan=lifespan)
 
@@ -224,8 +333,7 @@ def create_app(
     @app.post("/api/sessions")
     def create_session(body: dict | None = None):
         working_dir = (body or {}).get("working_dir", "")
-        if working_dir:
-            working_dir = str(Path(working_dir).expanduser().resolve())
+        working_dir = _norm_wd(working_dir) if working_dir else ""
         session_config = (body or {}).get("config")
         error = _validate_session_config(session_config)
         if error:
@@ -262,15 +370,15 @@ def create_app(
             return JSONResponse(status_code=404, content={"detail": "Not found"})
         messages = store.get_messages(session_id)
         cards = runner.get_cards(session_id, session["agent_names"])
-        payload = json.dumps(
+        payload = orjson.dumps(
             {
                 "session": session,
                 "messages": messages,
                 "cards": cards,
                 "exported_at": datetime.now(timezone.utc).isoformat(),
             },
-            indent=2,
             default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
         )
         return Response(
             content=payload,
@@ -322,6 +430,7 @@ def create_app(
         if invalid:
             return JSONResponse(status_code=400, content={"detail": f"Unknown settings keys: {invalid}"})
         settings.set_many(body)
+        _invalidate_connected_frame()
         return settings.get_all()
 
     @app.get("/api/settings/{key:path}")
@@ -336,11 +445,13 @@ def create_app(
         if "value" not in body:
             return JSONResponse(status_code=400, content={"detail": "Missing 'value' in request body"})
         settings.set(key, body["value"])
+        _invalidate_connected_frame()
         return {"key": key, "value": body["value"]}
 
     @app.delete("/api/settings/{key:path}")
     def delete_setting(key: str):
         settings.delete(key)
+        _invalidate_connected_frame()
         return {"ok": True}
     # --- Card REST API (used by agents via CLI script) ---
 
@@ -416,34 +527,365 @@ def create_app(
         except KeyError as exc:
             return JSONResponse(status_code=404, content={"detail": str(exc)})
 
+    # --- WebSocket message handlers (one per client message type) ---
+
+    async def _ws_create_session(conn: _WsConnection, msg: dict) -> None:
+        reply = conn.outbox.send_nowait
+        working_dir = msg.get("working_dir", "")
+        working_dir = _norm_wd(working_dir) if working_dir else ""
+        agents_spec = msg.get("agents", agents_list)
+        if "agents" in msg:
+            error = _validate_create_session_agents(agents_spec)
+            if error:
+                reply({"type": "error", "message": error})
+                return
+        agents_spec = _agents_with_models(agents_spec)
+        session_config = msg.get("config")
+        error = _validate_session_config(session_config)
+        if error:
+            reply({"type": "error", "message": error})
+            return
+        session = await _store_call(
+            store.create_session,
+            agent_names=agents_spec,
+            working_dir=working_dir,
+            config=session_config,
+        )
+        session_id = conn.session_id = session["id"]
+        runner.subscribe(session_id, conn.outbox)
+        # Start warming agents in background for faster first response
+        runner.start_warmup(session_id, session["agent_names"])
+        # Auto-init .multiagents/ in working_dir if specified
+        if working_dir:
+            from ..memory.cli import init_project
+            try:
+                init_project(Path(working_dir))
+            except Exception:
+                log.debug("failed to init memory in %s", working_dir, exc_info=True)
+        reply({"type": "session_created", "session_id": session_id, "agents": session["agent_names"]})
+
+    async def _ws_join_session(conn: _WsConnection, msg: dict) -> None:
+        reply = conn.outbox.send_nowait
+        sid = msg.get("session_id")
+        if not sid:
+            reply({"type": "error", "message": "Missing session_id"})
+            return
+        session = await _store_call(store.get_session, sid)
+        if session is None:
+            reply({"type": "error", "message": "Session not found"})
+            return
+        session_id = conn.session_id = sid
+        runner.subscribe(session_id, conn.outbox)
+        # Start warming agents if not already warmed
+        runner.start_warmup(session_id, session["agent_names"])
+        messages = await _store_call(store.get_messages, session_id)
+        state = await _store_call(store.get_session_state, session_id)
+        in_flight = None
+        is_running = runner.is_running(session_id)
+        if state and state.get("is_running"):
+            if not is_running:
+                start_round = max(state.get("current_round", 0) - 1, 0)
+                runner.run_prompt(
+                    session_id=session_id,
+                    prompt="",
+                    agent_names=session["agent_names"],
+                    start_round=start_round,
+                )
+                is_running = True
+            progress = await _store_call(store.get_agent_progress, session_id)
+            in_flight = {
+                "round": state.get("current_round", 0),
+                "agent_streams": {k: v.get("stream_text", "") for k, v in progress.items()},
+                "agent_statuses": {k: v.get("status", "idle") for k, v in progress.items()},
+            }
+        cards = runner.get_cards(session_id, session["agent_names"])
+        reply({
+            "type": "session_joined", "session_id": session_id,
+            "title": session.get("title", ""), "agents": _agents_with_models(session["agent_names"]),
+            "messages": messages, "is_running": is_running, "in_flight": in_flight,
+            "cards": cards,
+        })
+        last_event_id = msg.get("last_event_id")
+        if isinstance(last_event_id, int) and last_event_id > 0:
+            await runner.replay_events(session_id, last_event_id, conn.outbox)
+
+    @_requires_session
+    async def _ws_message(conn: _WsConnection, msg: dict) -> None:
+        session_id = conn.session_id
+        text = msg.get("text", "").strip()
+        if not text:
+            return
+        if runner.is_running(session_id):
+            runner.inject_message(session_id, text)
+            await _store_call(store.save_message, session_id, "user", text)
+            return
+        saved = await _store_call(store.save_message, session_id, "user", text)
+        await runner.broadcast(session_id, {"type": "user_message", "text": text, "created_at": saved["created_at"]})
+        messages = await _store_call(store.get_messages, session_id)
+        if len(messages) == 1:
+            title = text[:50] + ("..." if len(text) > 50 else "")
+            await _store_call(store.update_title, session_id, title)
+            await runner.broadcast(session_id, {"type": "title_changed", "title": title})
+        agents = await runner.get_session_agents(session_id)
+        runner.run_prompt(session_id=session_id, prompt=text, agent_names=agents)
+
+    async def _ws_stop_agent(conn: _WsConnection, msg: dict) -> None:
+        if conn.session_id:
+            agent_name = msg.get("agent", "")
+            if agent_name:
+                runner.stop_agent(conn.session_id, agent_name)
+
+    async def _ws_stop_round(conn: _WsConnection, msg: dict) -> None:
+        if conn.session_id:
+            runner.stop_round(conn.session_id)
+
+    async def _ws_resume(conn: _WsConnection, msg: dict) -> None:
+        if conn.session_id:
+            runner.resume(conn.session_id)
+
+    @_requires_session
+    async def _ws_direct_message(conn: _WsConnection, msg: dict) -> None:
+        session_id = conn.session_id
+        agent_name = msg.get("agent", "").strip()
+        text = msg.get("text", "").strip()
+        if not agent_name or not text:
+            return
+        session = await _store_call(store.get_session, session_id)
+        existing_names = [a["name"] for a in (session or {}).get("agent_names", [])]
+        if agent_name not in existing_names:
+            conn.outbox.send_nowait({"type": "error", "message": f"Unknown agent: {agent_name}"})
+            return
+        # Save DM as a special message type for replay
+        saved = await _store_call(store.save_message, session_id, f"dm:{agent_name}", text)
+        # Broadcast so all connected clients see it
+        state_data = await _store_call(store.get_session_state, session_id)
+        current_round = state_data.get("current_round", 0) if state_data else 0
+        await runner.broadcast(session_id, {
+            "type": "dm_sent", "agent": agent_name,
+            "text": text, "round": current_round, "created_at": saved["created_at"],
+        })
+        if runner.is_running(session_id):
+            # Active round — queue a DM for the target agent
+            await runner.restart_agent(session_id, agent_name, text)
+        else:
+            # No active round — start a single-agent round with the DM
+            dm_prompt = f"[Direct message to {agent_name}]: {text}"
+            await _store_call(store.save_message, session_id, "user", dm_prompt)
+            runner.run_prompt(session_id, dm_prompt, [agent_name], start_round=current_round)
+
+    @_requires_session
+    async def _ws_add_agent(conn: _WsConnection, msg: dict) -> None:
+        reply = conn.outbox.send_nowait
+        session_id = conn.session_id
+        name = msg.get("name", "").strip()
+        agent_type = msg.get("agent_type", "").strip()
+        role = msg.get("role", "")
+        if not name or not agent_type:
+            reply({"type": "error", "message": "Missing name or agent_type"})
+            return
+        if agent_type not in ("claude", "codex", "kimi"):
+            reply({"type": "error", "message": f"Unknown agent type: {agent_type}"})
+            return
+        session = await _store_call(store.get_session, session_id)
+        existing_names = [a["name"] for a in session["agent_names"]]
+        if name in existing_names:
+            reply({"type": "error", "message": f"Agent name '{name}' already exists"})
+            return
+        persona = _agents_with_models([{"name": name, "type": agent_type, "role": role}])[0]
+        updated_agents = session["agent_names"] + [persona]
+        await _store_call(store.update_agents, session_id, updated_agents)
+        await _store_call(store.add_agent_state, session_id, name)
+        await runner.add_agent(session_id, persona)
+        await runner.broadcast(session_id, {
+            "type": "agent_added",
+            "name": name,
+            "agent_type": agent_type,
+            "role": role,
+            "model": persona.get("model"),
+        })
+
+    @_requires_session
+    async def _ws_remove_agent(conn: _WsConnection, msg: dict) -> None:
+        session_id = conn.session_id
+        name = msg.get("name", "").strip()
+        if not name:
+            return
+        session = await _store_call(store.get_session, session_id)
+        updated_agents = [a for a in session["agent_names"] if a["name"] != name]
+        if len(updated_agents) == len(session["agent_names"]):
+            conn.outbox.send_nowait({"type": "error", "message": f"Agent '{name}' not found"})
+            return
+        await _store_call(store.update_agents, session_id, updated_agents)
+        await _store_call(store.remove_agent_state, session_id, name)
+        await runner.remove_agent(session_id, name)
+        await runner.broadcast(session_id, {"type": "agent_removed", "name": name})
+
+    async def _ws_cancel(conn: _WsConnection, msg: dict) -> None:
+        if conn.session_id:
+            await runner.cancel(conn.session_id)
+
+    async def _ws_ack(conn: _WsConnection, msg: dict) -> None:
+        if conn.session_id:
+            event_id = msg.get("event_id")
+            if isinstance(event_id, int):
+                await runner.ack(conn.session_id, conn.outbox, event_id)
+
+    async def _ws_metric(conn: _WsConnection, msg: dict) -> None:
+        name = msg.get("name")
+        value = msg.get("value")
+        metric_sid = msg.get("session_id") or conn.session_id
+        if isinstance(name, str) and isinstance(value, (int, float)):
+            runner.log_client_metric(name, metric_sid, float(value))
+
+    async def _ws_permission_response(conn: _WsConnection, msg: dict) -> None:
+        if conn.session_id:
+            request_id = msg.get("request_id", "")
+            approved = msg.get("approved", False)
+            agent_name = msg.get("agent")  # target specific agent if provided
+            runner.resolve_permission(conn.session_id, request_id, approved, agent_name=agent_name)
+
+    @_requires_session
+    async def _ws_card_create(conn: _WsConnection, msg: dict) -> None:
+        session_id = conn.session_id
+        title = msg.get("title", "")
+        description = msg.get("description", "")
+        planner = msg.get("planner", "")
+        implementer = msg.get("implementer", "")
+        reviewer = msg.get("reviewer", "")
+        coordinator = msg.get("coordinator", "")
+        try:
+            card = await runner.create_card(
+                session_id, agents_list, title, description,
+                planner, implementer, reviewer, coordinator,
+            )
+            await runner.broadcast(session_id, {"type": "card_created", "card": card.to_dict()})
+        except Exception as exc:
+            conn.outbox.send_nowait({"type": "error", "message": str(exc)})
+
+    @_requires_card
+    async def _ws_card_update(conn: _WsConnection, msg: dict) -> None:
+        session_id = conn.session_id
+        # Message order, not set order: update_card applies fields one by one
+        # and stops at the first unknown key.
+        fields = {k: v for k, v in msg.items() if k not in _CARD_UPDATE_SKIP and v is not None}
+        try:
+            card = await runner.update_card(session_id, msg["card_id"], **fields)
+            await runner.broadcast(session_id, {"type": "card_updated", "card": card.to_dict()})
+        except Exception as exc:
+            conn.outbox.send_nowait({"type": "error", "message": str(exc)})
+
+    @_requires_card
+    async def _ws_card_start(conn: _WsConnection, msg: dict) -> None:
+        try:
+            agents = await runner.get_session_agents(conn.session_id)
+            await runner.start_card(conn.session_id, msg["card_id"], agents)
+        except Exception as exc:
+            conn.outbox.send_nowait({"type": "error", "message": str(exc)})
+
+    @_requires_card
+    async def _ws_card_delegate(conn: _WsConnection, msg: dict) -> None:
+        try:
+            agents = await runner.get_session_agents(conn.session_id)
+            await runner.delegate_card(conn.session_id, msg["card_id"], agents)
+        except Exception as exc:
+            conn.outbox.send_nowait({"type": "error", "message": str(exc)})
+
+    @_requires_card
+    async def _ws_card_done(conn: _WsConnection, msg: dict) -> None:
+        try:
+            card = await runner.mark_card_done(conn.session_id, msg["card_id"])
+            await runner.broadcast(conn.session_id, {"type": "card_updated", "card": card.to_dict()})
+        except Exception as exc:
+            conn.outbox.send_nowait({"type": "error", "message": str(exc)})
+
+    @_requires_card
+    async def _ws_card_delete(conn: _WsConnection, msg: dict) -> None:
+        card_id = msg["card_id"]
+        try:
+            await runner.delete_card(conn.session_id, card_id)
+            await runner.broadcast(conn.session_id, {"type": "card_deleted", "card_id": card_id})
+        except Exception as exc:
+            conn.outbox.send_nowait({"type": "error", "message": str(exc)})
+
+    ws_handlers: dict[str, _WsHandler] = {
+        "create_session": _ws_create_session,
+        "join_session": _ws_join_session,
+        "message": _ws_message,
+        "stop_agent": _ws_stop_agent,
+        "stop_round": _ws_stop_round,
+        "resume": _ws_resume,
+        "direct_message": _ws_direct_message,
+        "add_agent": _ws_add_agent,
+        "remove_agent": _ws_remove_agent,
+        "cancel": _ws_cancel,
+        "ack": _ws_ack,
+        "metric": _ws_metric,
+        "permission_response": _ws_permission_response,
+        "card_create": _ws_card_create,
+        "card_update": _ws_card_update,
+        "card_start": _ws_card_start,
+        "card_delegate": _ws_card_delegate,
+        "card_done": _ws_card_done,
+        "card_delete": _ws_card_delete,
+    }
+
     @app.websocket("/ws")
     async def websocket_endpoint(ws: WebSocket) -> None:
-        await ws.accept()
-        log.info("ws connected")
-        session_id: str | None = None
-        await ws.send_json({"type": "connected", "agents": _agents_with_models(agents_list)})
+        subprotocol = negotiate_subprotocol(ws.scope.get("subprotocols", []))
+        binary = subprotocol == MSGPACK_SUBPROTOCOL
+        await ws.accept(subprotocol=subprotocol)
+        log.info("ws connected format=%s", "msgpack" if binary else "json")
+        if binary:
+            await ws.send_bytes(_connected_frame(True))
+        else:
+            await ws.send_text(_connected_frame(False))
+        # Replies and runner broadcasts are both queued here and sent by the
+        # outbox writer task, so the read loop never waits on the socket.
+        outbox = Outbox(
+            ws,
+            send_timeout=send_timeout,
+            binary=binary,
+            batch=ws.query_params.get("batch") == "1",
+        )
+        outbox.start()
+        reply = outbox.send_nowait
+        conn = _WsConnection(outbox)
+        # Handlers run on their own task in arrival order, so a slow store or
+        # runner call never stalls reading (or rate limiting) the socket.
+        commands: asyncio.Queue[tuple[_WsHandler, dict] | None] = asyncio.Queue()
+        worker = asyncio.create_task(_run_ws_commands(conn, commands), name="ws-commands")
 
         # Rate limiting state
         _rate_timestamps: list[float] = []
 
         try:
-            while True:
-                # Receive raw text first for size checking
-                raw = await ws.receive_text()
+            # _iter_frames ends cleanly on disconnect; cleanup lives in ``finally``.
+            async for raw in _iter_frames(ws):
+                # Check the raw frame size before parsing
                 if len(raw) > _MAX_WS_MESSAGE_SIZE:
-                    await ws.send_json({"type": "error", "message": f"Message too large (max {_MAX_WS_MESSAGE_SIZE} bytes)"})
+                    reply({"type": "error", "message": f"Message too large (max {_MAX_WS_MESSAGE_SIZE} bytes)"})
                     continue
 
-                try:
-                    msg = json.loads(raw)
-                except (json.JSONDecodeError, ValueError):
-                    await ws.send_json({"type": "error", "message": "Invalid JSON"})
-                    continue
+                if isinstance(raw, bytes):
+                    if not binary:
+                        reply({"type": "error", "message": "Binary frames require the msgpack subprotocol"})
+                        continue
+                    try:
+                        msg = decode_msgpack(raw)
+                    except (ValueError, TypeError):
+                        reply({"type": "error", "message": "Invalid MessagePack"})
+                        continue
+                else:
+                    try:
+                        msg = decode_json(raw)
+                    except ValueError:
+                        reply({"type": "error", "message": "Invalid JSON"})
+                        continue
 
                 # Schema validation
                 validation_error = _validate_ws_message(msg)
                 if validation_error:
-                    await ws.send_json({"type": "error", "message": validation_error})
+                    reply({"type": "error", "message": validation_error})
                     continue
 
                 # Rate limiting
@@ -451,338 +893,62 @@ def create_app(
                 _rate_timestamps = [t for t in _rate_timestamps if now - t < _RATE_LIMIT_WINDOW]
                 _rate_timestamps.append(now)
                 if len(_rate_timestamps) > _RATE_LIMIT_MAX:
-                    await ws.send_json({"type": "error", "message": "Rate limit exceeded, slow down"})
+                    reply({"type": "error", "message": "Rate limit exceeded, slow down"})
                     continue
 
-                msg_type = msg.get("type")
-
-                if msg_type == "create_session":
-                    working_dir = msg.get("working_dir", "")
-                    if working_dir:
-                        working_dir = str(Path(working_dir).expanduser().resolve())
-                    agents_spec = msg.get("agents", agents_list)
-                    if "agents" in msg:
-                        error = _validate_create_session_agents(agents_spec)
-                        if error:
-                            await ws.send_json({"type": "error", "message": error})
-                            continue
-                    agents_spec = _agents_with_models(agents_spec)
-                    session_config = msg.get("config")
-                    error = _validate_session_config(session_config)
-                    if error:
-                        await ws.send_json({"type": "error", "message": error})
-                        continue
-                    session = await _store_call(
-                        store.create_session,
-                        agent_names=agents_spec,
-                        working_dir=working_dir,
-                        config=session_config,
-                    )
-                    session_id = session["id"]
-                    runner.subscribe(session_id, ws)
-                    # Start warming agents in background for faster first response
-                    runner.start_warmup(session_id, session["agent_names"])
-                    # Auto-init .multiagents/ in working_dir if specified
-                    if working_dir:
-                        from ..memory.cli import init_project
-                        try:
-                            init_project(Path(working_dir))
-                        except Exception:
-                            log.debug("failed to init memory in %s", working_dir, exc_info=True)
-                    await ws.send_json({"type": "session_created", "session_id": session_id, "agents": session["agent_names"]})
-
-                elif msg_type == "join_session":
-                    sid = msg.get("session_id")
-                    if not sid:
-                        await ws.send_json({"type": "error", "message": "Missing session_id"})
-                        continue
-                    session = await _store_call(store.get_session, sid)
-                    if session is None:
-                        await ws.send_json({"type": "error", "message": "Session not found"})
-                    else:
-                        session_id = sid
-                        runner.subscribe(session_id, ws)
-                        # Start warming agents if not already warmed
-                        runner.start_warmup(session_id, session["agent_names"])
-                        messages = await _store_call(store.get_messages, session_id)
-                        state = await _store_call(store.get_session_state, session_id)
-                        in_flight = None
-                        is_running = runner.is_running(session_id)
-                        if state and state.get("is_running"):
-                            if not is_running:
-                                start_round = max(state.get("current_round", 0) - 1, 0)
-                                runner.run_prompt(
-                                    session_id=session_id,
-                                    prompt="",
-                                    agent_names=session["agent_names"],
-                                    start_round=start_round,
-                                )
-                                is_running = True
-                            progress = await _store_call(store.get_agent_progress, session_id)
-                            in_flight = {
-                                "round": state.get("current_round", 0),
-                                "agent_streams": {k: v.get("stream_text", "") for k, v in progress.items()},
-                                "agent_statuses": {k: v.get("status", "idle") for k, v in progress.items()},
-                            }
-                        cards = runner.get_cards(session_id, session["agent_names"])
-                        await ws.send_json({
-                            "type": "session_joined", "session_id": session_id,
-                            "title": session.get("title", ""), "agents": _agents_with_models(session["agent_names"]),
-                            "messages": messages, "is_running": is_running, "in_flight": in_flight,
-                            "cards": cards,
-                        })
-                        last_event_id = msg.get("last_event_id")
-                        if isinstance(last_event_id, int) and last_event_id > 0:
-                            await runner.replay_events(session_id, last_event_id, ws)
-
-                elif msg_type == "message":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    text = msg.get("text", "").strip()
-                    if not text:
-                        continue
-                    if runner.is_running(session_id):
-                        runner.inject_message(session_id, text)
-                        await _store_call(store.save_message, session_id, "user", text)
-                    else:
-                        saved = await _store_call(store.save_message, session_id, "user", text)
-                        await runner.broadcast(session_id, {"type": "user_message", "text": text, "created_at": saved["created_at"]})
-                        messages = await _store_call(store.get_messages, session_id)
-                        if len(messages) == 1:
-                            title = text[:50] + ("..." if len(text) > 50 else "")
-                            await _store_call(store.update_title, session_id, title)
-                            await runner.broadcast(session_id, {"type": "title_changed", "title": title})
-                        session = await _store_call(store.get_session, session_id)
-                        runner.run_prompt(session_id=session_id, prompt=text, agent_names=session["agent_names"])
-
-                elif msg_type == "stop_agent":
-                    if session_id:
-                        agent_name = msg.get("agent", "")
-                        if agent_name:
-                            runner.stop_agent(session_id, agent_name)
-
-                elif msg_type == "stop_round":
-                    if session_id:
-                        runner.stop_round(session_id)
-
-                elif msg_type == "resume":
-                    if session_id:
-                        runner.resume(session_id)
-
-                elif msg_type == "direct_message":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    agent_name = msg.get("agent", "").strip()
-                    text = msg.get("text", "").strip()
-                    if not agent_name or not text:
-                        continue
-                    session = await _store_call(store.get_session, session_id)
-                    existing_names = [a["name"] for a in (session or {}).get("agent_names", [])]
-                    if agent_name not in existing_names:
-                        await ws.send_json({"type": "error", "message": f"Unknown agent: {agent_name}"})
-                        continue
-                    # Save DM as a special message type for replay
-                    saved = await _store_call(store.save_message, session_id, f"dm:{agent_name}", text)
-                    # Broadcast so all connected clients see it
-                    state_data = await _store_call(store.get_session_state, session_id)
-                    current_round = state_data.get("current_round", 0) if state_data else 0
-                    await runner.broadcast(session_id, {
-                        "type": "dm_sent", "agent": agent_name,
-                        "text": text, "round": current_round, "created_at": saved["created_at"],
-                    })
-                    if runner.is_running(session_id):
-                        # Active round — queue a DM for the target agent
-                        await runner.restart_agent(session_id, agent_name, text)
-                    else:
-                        # No active round — start a single-agent round with the DM
-                        dm_prompt = f"[Direct message to {agent_name}]: {text}"
-                        await _store_call(store.save_message, session_id, "user", dm_prompt)
-                        runner.run_prompt(session_id, dm_prompt, [agent_name], start_round=current_round)
-
-                elif msg_type == "add_agent":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    name = msg.get("name", "").strip()
-                    agent_type = msg.get("agent_type", "").strip()
-                    role = msg.get("role", "")
-                    if not name or not agent_type:
-                        await ws.send_json({"type": "error", "message": "Missing name or agent_type"})
-                        continue
-                    if agent_type not in ("claude", "codex", "kimi"):
-                        await ws.send_json({"type": "error", "message": f"Unknown agent type: {agent_type}"})
-                        continue
-                    session = await _store_call(store.get_session, session_id)
-                    existing_names = [a["name"] for a in session["agent_names"]]
-                    if name in existing_names:
-                        await ws.send_json({"type": "error", "message": f"Agent name '{name}' already exists"})
-                        continue
-                    persona = _agents_with_models([{"name": name, "type": agent_type, "role": role}])[0]
-                    updated_agents = session["agent_names"] + [persona]
-                    await _store_call(store.update_agents, session_id, updated_agents)
-                    await _store_call(store.add_agent_state, session_id, name)
-                    await runner.add_agent(session_id, persona)
-                    await runner.broadcast(session_id, {
-                        "type": "agent_added",
-                        "name": name,
-                        "agent_type": agent_type,
-                        "role": role,
-                        "model": persona.get("model"),
-                    })
-
-                elif msg_type == "remove_agent":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    name = msg.get("name", "").strip()
-                    if not name:
-                        continue
-                    session = await _store_call(store.get_session, session_id)
-                    updated_agents = [a for a in session["agent_names"] if a["name"] != name]
-                    if len(updated_agents) == len(session["agent_names"]):
-                        await ws.send_json({"type": "error", "message": f"Agent '{name}' not found"})
-                        continue
-                    await _store_call(store.update_agents, session_id, updated_agents)
-                    await _store_call(store.remove_agent_state, session_id, name)
-                    await runner.remove_agent(session_id, name)
-                    await runner.broadcast(session_id, {"type": "agent_removed", "name": name})
-
-                elif msg_type == "cancel":
-                    if session_id:
-                        await runner.cancel(session_id)
-
-                elif msg_type == "ack":
-                    if session_id:
-                        event_id = msg.get("event_id")
-                        if isinstance(event_id, int):
-                            await runner.ack(session_id, ws, event_id)
-
-                elif msg_type == "metric":
-                    name = msg.get("name")
-                    value = msg.get("value")
-                    metric_sid = msg.get("session_id") or session_id
-                    if isinstance(name, str) and isinstance(value, (int, float)):
-                        runner.log_client_metric(name, metric_sid, float(value))
-
-                elif msg_type == "permission_response":
-                    if session_id:
-                        request_id = msg.get("request_id", "")
-                        approved = msg.get("approved", False)
-                        agent_name = msg.get("agent")  # target specific agent if provided
-                        runner.resolve_permission(session_id, request_id, approved, agent_name=agent_name)
-
-                elif msg_type == "card_create":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    title = msg.get("title", "")
-                    description = msg.get("description", "")
-                    planner = msg.get("planner", "")
-                    implementer = msg.get("implementer", "")
-                    reviewer = msg.get("reviewer", "")
-                    coordinator = msg.get("coordinator", "")
-                    try:
-                        card = await runner.create_card(
-                            session_id, agents_list, title, description,
-                            planner, implementer, reviewer, coordinator,
-                        )
-                        await runner.broadcast(session_id, {"type": "card_created", "card": card.to_dict()})
-                    except Exception as exc:
-                        await ws.send_json({"type": "error", "message": str(exc)})
-
-                elif msg_type == "card_update":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    card_id = msg.get("card_id")
-                    if not card_id:
-                        await ws.send_json({"type": "error", "message": "Missing card_id"})
-                        continue
-                    fields = {k: v for k, v in msg.items() if k not in ("type", "card_id") and v is not None}
-                    try:
-                        card = await runner.update_card(session_id, card_id, **fields)
-                        await runner.broadcast(session_id, {"type": "card_updated", "card": card.to_dict()})
-                    except Exception as exc:
-                        await ws.send_json({"type": "error", "message": str(exc)})
-
-                elif msg_type == "card_start":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    card_id = msg.get("card_id")
-                    if not card_id:
-                        await ws.send_json({"type": "error", "message": "Missing card_id"})
-                        continue
-                    try:
-                        session = await _store_call(store.get_session, session_id)
-                        await runner.start_card(session_id, card_id, session["agent_names"])
-                    except Exception as exc:
-                        await ws.send_json({"type": "error", "message": str(exc)})
-
-                elif msg_type == "card_delegate":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    card_id = msg.get("card_id")
-                    if not card_id:
-                        await ws.send_json({"type": "error", "message": "Missing card_id"})
-                        continue
-                    try:
-                        session = await _store_call(store.get_session, session_id)
-                        await runner.delegate_card(session_id, card_id, session["agent_names"])
-                    except Exception as exc:
-                        await ws.send_json({"type": "error", "message": str(exc)})
-
-                elif msg_type == "card_done":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    card_id = msg.get("card_id")
-                    if not card_id:
-                        await ws.send_json({"type": "error", "message": "Missing card_id"})
-                        continue
-                    try:
-                        card = await runner.mark_card_done(session_id, card_id)
-                        await runner.broadcast(session_id, {"type": "card_updated", "card": card.to_dict()})
-                    except Exception as exc:
-                        await ws.send_json({"type": "error", "message": str(exc)})
-
-                elif msg_type == "card_delete":
-                    if not session_id:
-                        await ws.send_json({"type": "error", "message": "No session"})
-                        continue
-                    card_id = msg.get("card_id")
-                    if not card_id:
-                        await ws.send_json({"type": "error", "message": "Missing card_id"})
-                        continue
-                    try:
-                        await runner.delete_card(session_id, card_id)
-                        await runner.broadcast(session_id, {"type": "card_deleted", "card_id": card_id})
-                    except Exception as exc:
-                        await ws.send_json({"type": "error", "message": str(exc)})
+                if commands.qsize() >= _MAX_PENDING_COMMANDS:
+                    reply({"type": "error", "message": "Too many pending commands, slow down"})
+                    continue
+                # _validate_ws_message only lets known types through
+                commands.put_nowait((ws_handlers[msg["type"]], msg))
 
         except WebSocketDisconnect:
+            pass
+        finally:
             log.info("ws disconnected")
-            if session_id:
-                runner.unsubscribe(session_id, ws)
+            # Commands received before the disconnect still run, in order.
+            commands.put_nowait(None)
+            try:
+                await worker
+            except asyncio.CancelledError:
+                worker.cancel()
+                raise
+            finally:
+                if conn.session_id:
+                    runner.unsubscribe(conn.session_id, outbox)
+                await outbox.close()
 
     # Serve static files if STATIC_DIR is set (production mode)
     static_dir = os.environ.get("STATIC_DIR")
     if static_dir and os.path.isdir(static_dir):
         log.info("Serving static files from: %s", static_dir)
+        # The build output is immutable while the server runs: stat it once.
+        static_index = _build_static_index(static_dir)
+
+        def _static_response(request: Request, path: str) -> Response:
+            entry = static_index.get(path)
+            if entry is None:
+                path = "index.html"
+                entry = static_index.get(path)
+            if entry is None:
+                return JSONResponse(status_code=404, content={"detail": "Not found"})
+            file_path, stat_result, etag = entry
+            # Vite emits content-hashed names under assets/; everything else
+            # (index.html in particular, including the SPA fallback for unknown
+            # paths) must be revalidated.
+            cache_control = _IMMUTABLE_CACHE if path.startswith("assets/") else "no-cache"
+            headers = {"ETag": etag, "Cache-Control": cache_control}
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers=headers)
+            return FileResponse(file_path, stat_result=stat_result, headers=headers)
 
         @app.get("/")
-        async def serve_index():
-            return FileResponse(os.path.join(static_dir, "index.html"))
+        async def serve_index(request: Request):
+            return _static_response(request, "index.html")
 
         @app.get("/{path:path}")
-        async def serve_static(path: str):
-            file_path = os.path.join(static_dir, path)
-            if os.path.exists(file_path) and os.path.isfile(file_path):
-                return FileResponse(file_path)
-            # Fallback to index.html for SPA routing
-            return FileResponse(os.path.join(static_dir, "index.html"))
+        async def serve_static(request: Request, path: str):
+            # Unknown paths fall back to index.html for SPA routing
+            return _static_response(request, path)
 
     return app
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from fastapi import WebSocket
+
+from .wire import Frame, encode_json_batch, encode_msgpack_batch
+
+log = logging.getLogger("multiagents")
+
+_DEFAULT_OUTBOX_SIZE = 1024
+_MAX_WRITE_BATCH = 32
+
+
+class Outbox:
+    """Per-connection outbound queue drained by a single writer task.
+
+    Broadcast fanout only enqueues frames, so delivering one event to N
+    subscribers costs N ``put_nowait`` calls instead of N tasks. A subscriber
+    that stops draining (queue overflow, send error or send timeout) is marked
+    closed and its socket is shut so the client reconnects and replays.
+    ``binary`` connections negotiated the msgpack subprotocol and get binary
+    frames; everyone else gets JSON text frames. ``batch`` connections opted
+    in to receiving a queued burst as one ``{"type": "batch"}`` frame.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        send_timeout: float = 120.0,
+        maxsize: int = _DEFAULT_OUTBOX_SIZE,
+        binary: bool = False,
+        batch: bool = False,
+    ) -> None:
+        self.ws = ws
+        self.send_timeout = send_timeout
+        self.binary = binary
+        self.batch = batch
+        self.closed = False
+        self._queue: asyncio.Queue[Frame] = asyncio.Queue(maxsize=maxsize)
+        self._writer: asyncio.Task | None = None
+        # Send timeout bookkeeping: a single watchdog timer covers every send
+        # made while it is armed, instead of a timeout scope per write.
+        self._send_started: float | None = None
+        self._watchdog: asyncio.TimerHandle | None = None
+
+    def start(self) -> None:
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run(), name="ws-writer")
+
+    def send_nowait(self, data: dict | Frame) -> bool:
+        """Queue a frame for delivery. Returns False if the subscriber is dead."""
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(data if isinstance(data, Frame) else Frame(data))
+        except asyncio.QueueFull:
+            log.warning("ws outbox overflow (%d frames queued); dropping subscriber", self._queue.qsize())
+            self._fail()
+            return False
+        return True
+
+    async def close(self) -> None:
+        self.closed = True
+        self._cancel_watchdog()
+        writer = self._writer
+        if writer and not writer.done() and writer is not asyncio.current_task():
+            writer.cancel()
+            try:
+                await writer
+            except asyncio.CancelledError:
+                pass
+
+    def _fail(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._cancel_watchdog()
+        if self._writer and not self._writer.done():
+            self._writer.cancel()
+        asyncio.ensure_future(self._close_socket())
+
+    def _cancel_watchdog(self) -> None:
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+
+    def _check_send_deadline(self) -> None:
+        self._watchdog = None
+        started = self._send_started
+        if started is None or self.closed:
+            return  # idle again; the next send re-arms
+        deadline = started + self.send_timeout
+        loop = asyncio.get_running_loop()
+        if loop.time() >= deadline:
+            log.warning("ws send timed out after %.0fs; dropping subscriber", self.send_timeout)
+            self._fail()
+            return
+        self._watchdog = loop.call_at(deadline, self._check_send_deadline)
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.ws.close(code=1011)
+        except Exception:
+            pass
+
+    async def _run(self) -> None:
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            # Drain whatever is already queued so a burst costs one wakeup
+            # instead of one per frame.
+            frames = [await queue.get()]
+            while len(frames) < _MAX_WRITE_BATCH and not queue.empty():
+                frames.append(queue.get_nowait())
+            frame = frames[0]
+            # A stuck send is caught by _check_send_deadline, which fails the
+            # outbox and cancels this task.
+            self._send_started = loop.time()
+            if self._watchdog is None:
+                self._watchdog = loop.call_at(self._send_started + self.send_timeout, self._check_send_deadline)
+            try:
+                if self.batch and len(frames) > 1:
+                    if self.binary:
+                        await self.ws.send_bytes(encode_msgpack_batch(frames))
+                    else:
+                        await self.ws.send_text(encode_json_batch(frames))
+                else:
+                    for frame in frames:
+                        if self.binary:
+                            await self.ws.send_bytes(frame.msgpack())
+                        else:
+                            await self.ws.send_text(frame.json())
+                self._send_started = None
+            except Exception as exc:
+                log.warning("ws send failed type=%s error=%s", frame.data.get("type"), exc)
+                self._writer = None
+                self._fail()
+                return
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import time
+from collections.abc import Callable
 
 from ..chat.events import (
     AgentCompleted,
@@ -19,58 +20,111 @@ from ..chat.events import (
     UserMessageReceived,
 )
 
-def _ts() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
-def event_to_dict(event: ChatEvent) -> dict:
-    match event:
-        case RoundStarted(round_number=rn, agents=agents):
-            return {"type": "round_started", "round": rn, "agents": agents}
-        case AgentStreamChunk(agent_name=agent, round_number=rn, text=text):
-            return {"type": "agent_stream", "agent": agent, "round": rn, "chunk": text}
-        case AgentStderr(agent_name=agent, round_number=rn, text=text):
-            return {"type": "agent_stderr", "agent": agent, "round": rn, "text": text}
-        case AgentNotice(agent_name=agent, message=msg):
-            return {"type": "agent_notice", "agent": agent, "message": msg, "created_at": _ts()}
-        case AgentCompleted(agent_name=agent, round_number=rn, response=resp, passed=passed, stopped=stopped):
-            return {
-                "type": "agent_completed",
-                "agent": agent,
-                "round": rn,
-                "text": resp.response,
-                "passed": passed,
-                "success": resp.success,
-                "latency_ms": resp.latency_ms,
-                "stopped": stopped,
-                "created_at": _ts(),
-            }
-        case RoundEnded(round_number=rn, all_passed=ap):
-            return {"type": "round_ended", "round": rn, "all_passed": ap}
-        case RoundPaused(round_number=rn):
-            return {"type": "paused", "round": rn}
-        case DiscussionEnded(reason=reason):
-            return {"type": "discussion_ended", "reason": reason}
-        case UserMessageReceived(text=text):
-            return {"type": "user_message", "text": text, "created_at": _ts()}
-        case AgentInterrupted(agent_name=agent, round_number=rn, partial_text=text):
-            return {"type": "agent_interrupted", "agent": agent, "round": rn, "partial_text": text, "created_at": _ts()}
-        case AgentPromptAssembled(agent_name=agent, round_number=rn, sections=sections):
-            return {"type": "agent_prompt", "agent": agent, "round": rn, "sections": sections}
-        case AgentDeliveryAcked(delivery_id=delivery_id, recipient=recipient, sender=sender, round_number=rn):
-            return {
-                "type": "delivery_acked",
-                "delivery_id": delivery_id,
-                "recipient": recipient,
-                "sender": sender,
-                "round": rn,
-                "created_at": _ts(),
-            }
-        case AgentPermissionRequested(agent_name=agent, round_number=rn, request_id=rid, tool_name=tool, tool_input=tinput, description=desc):
-            return {
-                "type": "permission_request", "agent": agent, "round": rn,
-                "request_id": rid, "tool_name": tool, "tool_input": tinput,
-                "description": desc, "created_at": _ts(),
-            }
-        case _:
-            return {"type": "unknown"}
+
+def _ts() -> int:
+    """Event timestamp as integer epoch milliseconds."""
+    return time.time_ns() // 1_000_000
+
+
+def _round_started(e: RoundStarted, ts: int | None) -> dict:
+    return {"type": "round_started", "round": e.round_number, "agents": e.agents}
+
+
+def _agent_stream(e: AgentStreamChunk, ts: int | None) -> dict:
+    return {"type": "agent_stream", "agent": e.agent_name, "round": e.round_number, "chunk": e.text}
+
+
+def _agent_stderr(e: AgentStderr, ts: int | None) -> dict:
+    return {"type": "agent_stderr", "agent": e.agent_name, "round": e.round_number, "text": e.text}
+
+
+def _agent_notice(e: AgentNotice, ts: int | None) -> dict:
+    return {"type": "agent_notice", "agent": e.agent_name, "message": e.message, "created_at": ts if ts is not None else _ts()}
+
+
+def _agent_completed(e: AgentCompleted, ts: int | None) -> dict:
+    resp = e.response
+    return {
+        "type": "agent_completed",
+        "agent": e.agent_name,
+        "round": e.round_number,
+        "text": resp.response,
+        "passed": e.passed,
+        "success": resp.success,
+        "latency_ms": resp.latency_ms,
+        "stopped": e.stopped,
+        "created_at": ts if ts is not None else _ts(),
+    }
+
+
+def _round_ended(e: RoundEnded, ts: int | None) -> dict:
+    return {"type": "round_ended", "round": e.round_number, "all_passed": e.all_passed}
+
+
+def _paused(e: RoundPaused, ts: int | None) -> dict:
+    return {"type": "paused", "round": e.round_number}
+
+
+def _discussion_ended(e: DiscussionEnded, ts: int | None) -> dict:
+    return {"type": "discussion_ended", "reason": e.reason}
+
+
+def _user_message(e: UserMessageReceived, ts: int | None) -> dict:
+    return {"type": "user_message", "text": e.text, "created_at": ts if ts is not None else _ts()}
+
+
+def _agent_interrupted(e: AgentInterrupted, ts: int | None) -> dict:
+    return {
+        "type": "agent_interrupted", "agent": e.agent_name, "round": e.round_number,
+        "partial_text": e.partial_text, "created_at": ts if ts is not None else _ts(),
+    }
+
+
+def _agent_prompt(e: AgentPromptAssembled, ts: int | None) -> dict:
+    return {"type": "agent_prompt", "agent": e.agent_name, "round": e.round_number, "sections": e.sections}
+
+
+def _delivery_acked(e: AgentDeliveryAcked, ts: int | None) -> dict:
+    return {
+        "type": "delivery_acked",
+        "delivery_id": e.delivery_id,
+        "recipient": e.recipient,
+        "sender": e.sender,
+        "round": e.round_number,
+        "created_at": ts if ts is not None else _ts(),
+    }
+
+
+def _permission_request(e: AgentPermissionRequested, ts: int | None) -> dict:
+    return {
+        "type": "permission_request", "agent": e.agent_name, "round": e.round_number,
+        "request_id": e.request_id, "tool_name": e.tool_name, "tool_input": e.tool_input,
+        "description": e.description, "created_at": ts if ts is not None else _ts(),
+    }
+
+
+def _unknown(e: ChatEvent, ts: int | None) -> dict:
+    return {"type": "unknown"}
+
+
+# Exact-class lookup: one dict probe per event instead of walking match cases.
+_BUILDERS: dict[type[ChatEvent], Callable[..., dict]] = {
+    RoundStarted: _round_started,
+    AgentStreamChunk: _agent_stream,
+    AgentStderr: _agent_stderr,
+    AgentNotice: _agent_notice,
+    AgentCompleted: _agent_completed,
+    RoundEnded: _round_ended,
+    RoundPaused: _paused,
+    DiscussionEnded: _discussion_ended,
+    UserMessageReceived: _user_message,
+    AgentInterrupted: _agent_interrupted,
+    AgentPromptAssembled: _agent_prompt,
+    AgentDeliveryAcked: _delivery_acked,
+    AgentPermissionRequested: _permission_request,
+}
+
+
+def event_to_dict(event: ChatEvent, *, ts: int | None = None) -> dict:
+    """Serialize *event* for the wire; ``ts`` lets a caller share one timestamp across a burst."""
+    return _BUILDERS.get(type(event), _unknown)(event, ts)
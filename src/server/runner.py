@@ -1,18 +1,22 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import hashlib
+import heapq
+import itertools
 import json
 import logging
 import os
 import time
-from collections.abc import Callable
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from importlib.metadata import PackageNotFoundError, version as pkg_version
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TypeVar
 
-from fastapi import WebSocket
-
 from ..agents import create_agents
 from ..agents.base import AgentResponse, BaseAgent
 from ..cards.engine import CardEngine
@@ -26,13 +30,43 @@ from ..chat.events import (
 )
 from ..chat.room import ChatRoom
 from ..chat.router import format_cards_section, format_session_context
+from ..memory.manager import MemoryManager
+from ..memory.recorder import SessionRecorder
+from .outbox import Outbox
 from .protocol import event_to_dict
 from .sessions import SessionStore
 from .settings import SettingsStore
+from .wire import Frame, encode_json
 
 log = logging.getLogger("multiagents")
 _SERVICE_NAME = "multiagents"
 _T = TypeVar("_T")
+# Card CLI wrappers agents get on their PATH (repo-root/scripts).
+_SCRIPTS_DIR = str(Path(__file__).resolve().parent.parent.parent / "scripts")
+
+
+async def run_blocking(fn: Callable[..., _T], *args: object, **kwargs: object) -> _T:
+    """Run *fn* in the default executor without copying the current context.
+
+    ``asyncio.to_thread`` snapshots contextvars on every call; nothing on the
+    server's store/memory paths reads contextvars, so skip that copy.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs) if args or kwargs else fn
+    return await loop.run_in_executor(None, call)
+
+
+# SessionStore/SettingsStore serialize on one SQLite connection behind a lock,
+# so extra threads only queue on it. Store calls get their own two threads and
+# never compete with memory finalization or other default-executor work.
+_STORE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="multiagents-store")
+
+
+async def run_store_call(fn: Callable[..., _T], *args: object, **kwargs: object) -> _T:
+    """Like run_blocking, but on the dedicated store executor."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs) if args or kwargs else fn
+    return await loop.run_in_executor(_STORE_EXECUTOR, call)
 
 
 def _extract_agent_names(agent_names: list[str] | list[dict]) -> list[str]:
@@ -70,22 +104,51 @@ def _format_card_system_message(data: dict) -> str | None:
 
 _DEFAULT_WARMUP_IDLE_TTL = 300.0
 _DEFAULT_ACK_TTL = 300.0
+_DEFAULT_STREAM_COALESCE_MS = 15.0
+# Flush a coalescing window early once this many chunks are buffered for a session.
+_STREAM_FLUSH_MAX_CHUNKS = 32
+# Upper bound on events persisted per SQLite transaction by the event writer.
+_EVENT_WRITE_BATCH = 128
+# Event ids are reserved from the store in blocks and handed out in-process.
+_EVENT_ID_BLOCK = 64
+# Memory context per (working_dir, prompt) is reused for a short while.
+_MEMORY_CONTEXT_TTL = 30.0
+_MEMORY_CONTEXT_CACHE_SIZE = 256
+# MemoryManagers (one SQLite connection each) unused for this long are dropped.
+_MEMORY_MANAGER_IDLE_TTL = 600.0
 try:
     _SERVICE_VERSION = pkg_version(_SERVICE_NAME)
 except PackageNotFoundError:
     _SERVICE_VERSION = "dev"
+# Static metric fields, encoded once and spliced into every metric line.
+_METRIC_STATIC_FIELDS = json.dumps(
+    {"service": _SERVICE_NAME, "version": _SERVICE_VERSION}, separators=(",", ":"),
+)[1:-1]
 
 
-@dataclass
+@dataclass(slots=True)
 class RoundMetrics:
     round_number: int
-    started_at: float
-    stream_chunks: dict[str, int] = field(default_factory=dict)
-    first_chunk_ms: dict[str, float] = field(default_factory=dict)
+    started_at_ns: int
+    # Per-agent chunk counts, positional: stream_chunks[agent_index[name]]
+    agent_index: dict[str, int] = field(default_factory=dict)
+    stream_chunks: list[int] = field(default_factory=list)
+    first_chunk_ms: dict[str, int] = field(default_factory=dict)
     latencies_ms: dict[str, float] = field(default_factory=dict)
     send_failures: int = 0
 
 
+@dataclass(slots=True)
+class _AckState:
+    """Replay acknowledgement bookkeeping for one subscriber."""
+
+    event_id: int
+    at: float
+    # Seq of this subscriber's live _ack_expiry entry; heap entries carrying
+    # any other seq are leftovers (e.g. from before a resubscribe).
+    expiry_seq: int = -1
+
+
 class SessionRunner:
     def __init__(
         self,
@@ -97,6 +160,7 @@ class SessionRunner:
         warmup_ttl: float = _DEFAULT_WARMUP_IDLE_TTL,
         ack_ttl: float = _DEFAULT_ACK_TTL,
         settings_store: SettingsStore | None = None,
+        stream_coalesce_ms: float = _DEFAULT_STREAM_COALESCE_MS,
     ) -> None:
         self.store = store
         self.settings_store = settings_store
@@ -106,11 +170,24 @@ class SessionRunner:
         self.hard_timeout = hard_timeout
         self.warmup_ttl = warmup_ttl
         self.ack_ttl = ack_ttl
+        self.stream_coalesce_ms = stream_coalesce_ms
+        self._card_api_url = os.environ.get("MULTIAGENTS_URL", "http://localhost:8421")
         self._tasks: dict[str, asyncio.Task] = {}
         self._rooms: dict[str, ChatRoom] = {}
-        self._subscribers: dict[str, set[WebSocket]] = {}
-        self._acks: dict[str, dict[WebSocket, int]] = {}
-        self._ack_times: dict[str, dict[WebSocket, float]] = {}
+        # Immutable per-session subscriber tuples, replaced on membership change
+        # so broadcast can iterate them without copying.
+        self._subscribers: dict[str, tuple[Outbox, ...]] = {}
+        self._acks: dict[str, dict[Outbox, _AckState]] = {}
+        # Lowest acked event id per session and how many subscribers sit at it;
+        # recomputed from _acks only when the last one at the minimum moves.
+        self._ack_low_water: dict[str, tuple[int, int]] = {}
+        # Min-heap of (expiry, seq, outbox) per session so stale-ack pruning
+        # only looks at entries that may have expired. Entries are lazy: one is
+        # pushed per new ack record and re-pushed on pop if the ack was refreshed;
+        # popped entries whose seq is not the ack's expiry_seq are discarded.
+        self._ack_expiry: dict[str, list[tuple[float, int, Outbox]]] = {}
+        self._ack_expiry_seq = itertools.count()
+        self._pruned_through: dict[str, int] = {}
         self._round_metrics: dict[str, dict[int, RoundMetrics]] = {}
         self._send_failures: dict[str, int] = {}
         self._session_send_timeouts: dict[str, float] = {}
@@ -129,29 +206,49 @@ class SessionRunner:
         self._delegation_responses: dict[str, dict[str, str]] = {}  # session_id -> {agent: response}
         # Debounce card system notifications (session_id -> monotonic timestamp)
         self._last_card_notify: dict[str, float] = {}
-
-    def subscribe(self, session_id: str, ws: WebSocket) -> None:
-        self._subscribers.setdefault(session_id, set()).add(ws)
-        self._acks.setdefault(session_id, {})[ws] = 0
-        self._ack_times.setdefault(session_id, {})[ws] = time.monotonic()
+        # Cached session["agent_names"]; dropped on add/remove agent and cleanup
+        self._session_agents: dict[str, list[dict]] = {}
+        # working_dir is fixed at session creation, so it is cached until delete
+        self._working_dirs: dict[str, str] = {}
+        # (working_dir, prompt digest) -> (monotonic timestamp, memory context), LRU order
+        self._memory_ctx_cache: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        # (working_dir, extraction_model) -> (MemoryManager, last used monotonic timestamp)
+        self._memory_managers: dict[tuple[str, str], tuple[MemoryManager, float]] = {}
+        # Stream chunks waiting to be merged into one agent_stream frame:
+        # {session_id: {(agent, round): [text, ...]}}, flushed by a timer or
+        # before any other broadcast so per-session event order is kept.
+        self._stream_buffers: dict[str, dict[tuple[str, int], list[str]]] = {}
+        self._stream_chunk_counts: dict[str, int] = {}
+        self._stream_flush_handles: dict[str, asyncio.TimerHandle] = {}
+        self._stream_locks: dict[str, asyncio.Lock] = {}
+        # Broadcast events waiting to be persisted, written in batches by one
+        # task per session so fanout never waits on SQLite.
+        self._event_writes: dict[str, list[tuple[int, dict, str]]] = {}
+        self._event_write_tasks: dict[str, asyncio.Task] = {}
+        # Unused part of each session's reserved event-id block: [next, end).
+        # A restart skips the remainder instead of reusing ids.
+        self._event_id_blocks: dict[str, tuple[int, int]] = {}
+        # Serializes block refills, so concurrent publishers never reserve
+        # two blocks and install the lower one last.
+        self._event_id_locks: dict[str, asyncio.Lock] = {}
+
+    def subscribe(self, session_id: str, ws: Outbox) -> None:
+        ws.send_timeout = self._session_send_timeouts.get(session_id, self.send_timeout)
+        subs = self._subscribers.get(session_id, ())
+        if ws not in subs:
+            self._subscribers[session_id] = subs + (ws,)
+        self._set_ack(session_id, ws, 0, time.monotonic(), reset=True)
         self._cancel_idle_cleanup(session_id)
 
-    def unsubscribe(self, session_id: str, ws: WebSocket) -> None:
+    def unsubscribe(self, session_id: str, ws: Outbox) -> None:
         subs = self._subscribers.get(session_id)
-        if subs:
-            subs.discard(ws)
-            if not subs:
+        if subs and ws in subs:
+            remaining = tuple(s for s in subs if s is not ws)
+            if remaining:
+                self._subscribers[session_id] = remaining
+            else:
                 self._subscribers.pop(session_id, None)
-        acks = self._acks.get(session_id)
-        if acks:
-            acks.pop(ws, None)
-            if not acks:
-                self._acks.pop(session_id, None)
-        times = self._ack_times.get(session_id)
-        if times:
-            times.pop(ws, None)
-            if not times:
-                self._ack_times.pop(session_id, None)
+        self._drop_acks(session_id, (ws,))
         if not self._subscribers.get(session_id) and not self.is_running(session_id):
             self._schedule_idle_cleanup(session_id)
 
@@ -166,37 +263,109 @@ class SessionRunner:
         return phase_task is not None and not phase_task.done()
 
     def _log_metric(self, name: str, **fields: object) -> None:
-        payload = {
-            "metric": name,
-            "ts": time.time(),
-            "service": _SERVICE_NAME,
-            "version": _SERVICE_VERSION,
-            **fields,
-        }
-        log.info("metric %s", json.dumps(payload, separators=(",", ":"), sort_keys=True))
+        if not log.isEnabledFor(logging.INFO):
+            return
+        body = encode_json({"metric": name, "ts": time.time(), **fields})
+        log.info("metric {%s,%s", _METRIC_STATIC_FIELDS, body[1:])
+
+    def _log_send_failure(self, session_id: str, event_type: object) -> None:
+        # Fixed-shape fast path for the most frequent metric.
+        if not log.isEnabledFor(logging.INFO):
+            return
+        log.info(
+            'metric {%s,"metric":"ws_send_failure","ts":%r,"session_id":%s,"event_type":%s}',
+            _METRIC_STATIC_FIELDS, time.time(), encode_json(session_id), encode_json(event_type),
+        )
 
     async def _store_call(self, fn: Callable[..., _T], *args: object, **kwargs: object) -> _T:
-        return await asyncio.to_thread(fn, *args, **kwargs)
+        return await run_store_call(fn, *args, **kwargs)
 
     def _prune_stale_acks(self, session_id: str) -> None:
         if self.ack_ttl <= 0:
             return
-        times = self._ack_times.get(session_id)
-        if not times:
+        heap = self._ack_expiry.get(session_id)
+        if not heap:
             return
         now = time.monotonic()
-        stale = [ws for ws, ts in times.items() if (now - ts) > self.ack_ttl]
-        if not stale:
+        if heap[0][0] >= now:
             return
+        acks = self._acks.get(session_id, {})
+        stale: list[Outbox] = []
+        while heap and heap[0][0] < now:
+            _, seq, ws = heapq.heappop(heap)
+            state = acks.get(ws)
+            if state is None or state.expiry_seq != seq:
+                continue  # dropped, or superseded by a newer entry
+            expiry = state.at + self.ack_ttl
+            if expiry < now:
+                stale.append(ws)
+            else:
+                state.expiry_seq = next(self._ack_expiry_seq)
+                heapq.heappush(heap, (expiry, state.expiry_seq, ws))
+        if stale:
+            self._drop_acks(session_id, stale)
+
+    def _set_ack(self, session_id: str, ws: Outbox, event_id: int, now: float, *, reset: bool = False) -> None:
+        acks = self._acks.setdefault(session_id, {})
+        state = acks.get(ws)
+        if state is None:
+            acks[ws] = state = _AckState(event_id, now)
+            self._ack_low_water_add(session_id, event_id)
+            if self.ack_ttl > 0:
+                heap = self._ack_expiry.setdefault(session_id, [])
+                if len(heap) >= 2 * len(acks):
+                    # Leftover entries outnumber live ones: compact, so churn
+                    # within one TTL cannot grow the heap without bound.
+                    heap[:] = [e for e in heap if (s := acks.get(e[2])) is not None and s.expiry_seq == e[1]]
+                    heapq.heapify(heap)
+                state.expiry_seq = next(self._ack_expiry_seq)
+                heapq.heappush(heap, (now + self.ack_ttl, state.expiry_seq, ws))
+            return
+        state.at = now
+        new_id = event_id if reset else max(state.event_id, event_id)
+        if new_id != state.event_id:
+            self._ack_low_water_remove(session_id, state.event_id)
+            state.event_id = new_id
+            self._ack_low_water_add(session_id, new_id)
+
+    def _drop_acks(self, session_id: str, outboxes: Iterable[Outbox]) -> None:
         acks = self._acks.get(session_id)
-        for ws in stale:
-            times.pop(ws, None)
-            if acks:
-                acks.pop(ws, None)
-        if not times:
-            self._ack_times.pop(session_id, None)
-        if acks is not None and not acks:
+        if not acks:
+            return
+        for ws in outboxes:
+            state = acks.pop(ws, None)
+            if state is not None:
+                self._ack_low_water_remove(session_id, state.event_id)
+        if not acks:
             self._acks.pop(session_id, None)
+            self._ack_low_water.pop(session_id, None)
+            self._ack_expiry.pop(session_id, None)
+
+    def _ack_low_water_add(self, session_id: str, event_id: int) -> None:
+        low = self._ack_low_water.get(session_id)
+        if low is None:
+            return  # unknown; recomputed on next read
+        if event_id < low[0]:
+            self._ack_low_water[session_id] = (event_id, 1)
+        elif event_id == low[0]:
+            self._ack_low_water[session_id] = (event_id, low[1] + 1)
+
+    def _ack_low_water_remove(self, session_id: str, event_id: int) -> None:
+        low = self._ack_low_water.get(session_id)
+        if low is None or event_id != low[0]:
+            return
+        if low[1] > 1:
+            self._ack_low_water[session_id] = (event_id, low[1] - 1)
+        else:
+            self._ack_low_water.pop(session_id, None)
+
+    def _min_ack(self, session_id: str) -> int:
+        low = self._ack_low_water.get(session_id)
+        if low is None:
+            ids = [state.event_id for state in self._acks[session_id].values()]
+            floor = min(ids)
+            low = self._ack_low_water[session_id] = (floor, ids.count(floor))
+        return low[0]
 
     def _cancel_next_card_phase(self, session_id: str) -> None:
         task = self._card_phase_tasks.pop(session_id, None)
@@ -218,7 +387,113 @@ class SessionRunner:
         payload = {"session_id": session_id, "value": value, "source": "client", **fields}
         self._log_metric(name, **payload)
 
+    async def queue_stream_chunk(self, session_id: str, agent_name: str, round_number: int, text: str) -> None:
+        """Buffer an agent_stream chunk; consecutive chunks go out as one frame."""
+        buffers = self._stream_buffers.setdefault(session_id, {})
+        buffers.setdefault((agent_name, round_number), []).append(text)
+        self._stream_chunk_counts[session_id] = count = self._stream_chunk_counts.get(session_id, 0) + 1
+        if self.stream_coalesce_ms <= 0 or count >= _STREAM_FLUSH_MAX_CHUNKS:
+            await self.flush_stream_chunks(session_id)
+            return
+        if session_id not in self._stream_flush_handles:
+            loop = asyncio.get_running_loop()
+            self._stream_flush_handles[session_id] = loop.call_later(
+                self.stream_coalesce_ms / 1000, self._schedule_stream_flush, session_id,
+            )
+
+    def _schedule_stream_flush(self, session_id: str) -> None:
+        self._stream_flush_handles.pop(session_id, None)
+        if session_id in self._stream_buffers:
+            asyncio.create_task(self.flush_stream_chunks(session_id), name=f"stream-flush-{session_id}")
+
+    async def flush_stream_chunks(self, session_id: str) -> None:
+        """Persist and broadcast buffered chunks for *session_id* in arrival order."""
+        lock = self._stream_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            handle = self._stream_flush_handles.pop(session_id, None)
+            if handle:
+                handle.cancel()
+            pending = self._stream_buffers.pop(session_id, None)
+            self._stream_chunk_counts.pop(session_id, None)
+            if not pending:
+                return
+            chunks = [(agent_name, round_number, "".join(parts)) for (agent_name, round_number), parts in pending.items()]
+            await self._store_call(self.store.append_agent_streams, session_id, chunks)
+            for agent_name, round_number, text in chunks:
+                await self._publish(session_id, {
+                    "type": "agent_stream", "agent": agent_name, "round": round_number, "chunk": text,
+                })
+
+    async def _flush_pending_streams(self, session_id: str) -> None:
+        """Flush buffered chunks (or wait out a flush in progress), if any."""
+        lock = self._stream_locks.get(session_id)
+        if session_id in self._stream_buffers or (lock is not None and lock.locked()):
+            await self.flush_stream_chunks(session_id)
+
+    def _drop_stream_buffers(self, session_id: str) -> None:
+        handle = self._stream_flush_handles.pop(session_id, None)
+        if handle:
+            handle.cancel()
+        self._stream_buffers.pop(session_id, None)
+        self._stream_chunk_counts.pop(session_id, None)
+        self._stream_locks.pop(session_id, None)
+
+    def _queue_event_write(self, session_id: str, event_id: int, data: dict, payload: str) -> None:
+        self._event_writes.setdefault(session_id, []).append((event_id, data, payload))
+        if session_id not in self._event_write_tasks:
+            self._event_write_tasks[session_id] = asyncio.create_task(
+                self._write_events(session_id), name=f"event-writes-{session_id}",
+            )
+
+    async def _write_events(self, session_id: str) -> None:
+        try:
+            while True:
+                pending = self._event_writes.get(session_id)
+                if not pending:
+                    self._event_writes.pop(session_id, None)
+                    return
+                batch = pending[:_EVENT_WRITE_BATCH]
+                del pending[:_EVENT_WRITE_BATCH]
+                try:
+                    await self._store_call(self.store.save_events, session_id, batch)
+                except Exception:
+                    log.exception("failed to persist %d events for session %s", len(batch), session_id)
+        finally:
+            self._event_write_tasks.pop(session_id, None)
+
+    async def flush_event_writes(self, session_id: str | None = None) -> None:
+        """Wait until queued events (for one session, or all) are in the store."""
+        session_ids = [session_id] if session_id is not None else list(self._event_write_tasks)
+        for sid in session_ids:
+            task = self._event_write_tasks.get(sid)
+            if task is not None:
+                await asyncio.shield(task)
+
+    def _take_event_id(self, session_id: str) -> int | None:
+        block = self._event_id_blocks.get(session_id)
+        if block is None or block[0] >= block[1]:
+            return None
+        self._event_id_blocks[session_id] = (block[0] + 1, block[1])
+        return block[0]
+
+    async def _next_event_id(self, session_id: str) -> int:
+        event_id = self._take_event_id(session_id)
+        if event_id is not None:
+            return event_id
+        lock = self._event_id_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            # Another publisher may have refilled the block while we waited.
+            event_id = self._take_event_id(session_id)
+            if event_id is not None:
+                return event_id
+            event_id = await self._store_call(self.store.reserve_event_ids, session_id, _EVENT_ID_BLOCK)
+            self._event_id_blocks[session_id] = (event_id + 1, event_id + _EVENT_ID_BLOCK)
+            return event_id
+
     async def broadcast(self, session_id: str, data: dict) -> int:
+        if data.get("type") != "agent_stream":
+            # Buffered chunks (or a flush in progress) must reach clients first.
+            await self._flush_pending_streams(session_id)
         card_message = _format_card_system_message(data)
         if card_message:
             now = time.monotonic()
@@ -228,90 +503,92 @@ class SessionRunner:
                 if room:
                     room.inject_system_message(card_message)
                 self._last_card_notify[session_id] = now
+        if "event_id" not in data:
+            data = dict(data)
+        return await self._publish(session_id, data)
 
-        subs = self._subscribers.get(session_id)
+    async def _publish(self, session_id: str, data: dict) -> int:
+        """Assign an event id, queue persistence and fan out; *data* is owned.
+
+        broadcast() is the general entry point; internally built payloads that
+        need none of its preamble (stream chunk flushes) come here directly.
+        """
+        frame: Frame | None = None
         if "event_id" not in data:
             try:
-                data = dict(data)
-                data["event_id"] = await self._store_call(self.store.reserve_event_id, session_id)
-                try:
-                    await self._store_call(self.store.save_event, session_id, data["event_id"], data)
-                except Exception:
-                    log.exception("failed to persist event %s:%s", session_id, data["event_id"])
+                data["event_id"] = await self._next_event_id(session_id)
+                # Encode once: the stored payload and every JSON subscriber share it.
+                frame = Frame(data)
+                self._queue_event_write(session_id, data["event_id"], data, frame.json())
             except Exception:
                 log.exception("failed to assign event id for session %s", session_id)
+        subs = self._subscribers.get(session_id)
         if not subs:
             log.debug("broadcast dropped (no subscribers): %s", session_id)
             return 0
         self._prune_stale_acks(session_id)
-        snapshot = list(subs)
-        dead: list[WebSocket] = []
+        dead: list[Outbox] = []
         sent = 0
-        timeout = self._session_send_timeouts.get(session_id, self.send_timeout)
-
-        async def _send(ws: WebSocket) -> None:
-            await asyncio.wait_for(ws.send_json(data), timeout=timeout)
-
-        results = await asyncio.gather(*[_send(ws) for ws in snapshot], return_exceptions=True)
-        for ws, result in zip(snapshot, results):
-            if isinstance(result, Exception):
-                log.warning("broadcast failed session=%s type=%s error=%s", session_id, data.get("type"), result)
-                self._send_failures[session_id] = self._send_failures.get(session_id, 0) + 1
-                session_metrics = self._round_metrics.get(session_id, {})
-                target_round = data.get("round")
-                metrics: RoundMetrics | None = None
-                if isinstance(target_round, int):
-                    metrics = session_metrics.get(target_round)
-                elif session_metrics:
-                    latest_round = max(session_metrics)
-                    metrics = session_metrics.get(latest_round)
-                if metrics:
-                    metrics.send_failures += 1
-                self._log_metric(
-                    "ws_send_failure",
-                    session_id=session_id,
-                    event_type=data.get("type"),
-                )
-                dead.append(ws)
-            else:
+        if frame is None:
+            frame = Frame(data)
+        # Fanout only enqueues; each connection's writer task does the send.
+        for ws in subs:
+            if ws.send_nowait(frame):
                 sent += 1
-        for ws in dead:
-            subs.discard(ws)
-            acks = self._acks.get(session_id)
-            if acks:
-                acks.pop(ws, None)
-            times = self._ack_times.get(session_id)
-            if times:
-                times.pop(ws, None)
-        if not subs:
-            self._subscribers.pop(session_id, None)
-            self._acks.pop(session_id, None)
-            self._ack_times.pop(session_id, None)
-        if sent == 0 and snapshot:
+            else:
+                dead.append(ws)
+        if dead:
+            self._drop_dead_subscribers(session_id, subs, dead, data)
+        if sent == 0:
             log.warning("broadcast delivered to 0 subscribers session=%s type=%s", session_id, data.get("type"))
         return sent
 
-    async def replay_events(self, session_id: str, after_event_id: int, ws: WebSocket) -> None:
-        events = await self._store_call(self.store.get_events_since, session_id, after_event_id)
-        timeout = self._session_send_timeouts.get(session_id, self.send_timeout)
-        for event in events:
-            try:
-                await asyncio.wait_for(ws.send_json(event), timeout=timeout)
-            except Exception as exc:
-                log.warning("replay failed session=%s type=%s error=%s", session_id, event.get("type"), exc)
+    def _drop_dead_subscribers(
+        self, session_id: str, subs: tuple[Outbox, ...], dead: list[Outbox], data: dict,
+    ) -> None:
+        """Record send failures and drop *dead* in one membership update (rare path)."""
+        event_type = data.get("type")
+        for _ in dead:
+            log.warning("broadcast failed session=%s type=%s error=subscriber closed", session_id, event_type)
+            self._log_send_failure(session_id, event_type)
+        self._send_failures[session_id] = self._send_failures.get(session_id, 0) + len(dead)
+        session_metrics = self._round_metrics.get(session_id, {})
+        target_round = data.get("round")
+        metrics: RoundMetrics | None = None
+        if isinstance(target_round, int):
+            metrics = session_metrics.get(target_round)
+        elif session_metrics:
+            metrics = session_metrics.get(max(session_metrics))
+        if metrics:
+            metrics.send_failures += len(dead)
+        dead_set = set(dead)
+        remaining = tuple(ws for ws in subs if ws not in dead_set)
+        if remaining:
+            self._subscribers[session_id] = remaining
+        else:
+            self._subscribers.pop(session_id, None)
+        self._drop_acks(session_id, dead)
+
+    async def replay_events(self, session_id: str, after_event_id: int, ws: Outbox) -> None:
+        await self.flush_event_writes(session_id)
+        events = await self._store_call(self.store.get_event_payloads_since, session_id, after_event_id)
+        for event, payload in events:
+            if not ws.send_nowait(Frame(event, payload)):
+                log.warning("replay failed session=%s type=%s error=subscriber closed", session_id, event.get("type"))
                 break
 
-    async def ack(self, session_id: str, ws: WebSocket, event_id: int) -> None:
-        acks = self._acks.setdefault(session_id, {})
-        acks[ws] = max(acks.get(ws, 0), event_id)
-        self._ack_times.setdefault(session_id, {})[ws] = time.monotonic()
+    async def ack(self, session_id: str, ws: Outbox, event_id: int) -> None:
+        self._set_ack(session_id, ws, event_id, time.monotonic())
         self._prune_stale_acks(session_id)
-        if not acks:
+        if session_id not in self._acks:
             return
-        min_ack = min(acks.values())
-        if min_ack > 0:
+        min_ack = self._min_ack(session_id)
+        # Acks are cumulative; only touch the store when the low-water mark moves.
+        if min_ack > self._pruned_through.get(session_id, 0):
             try:
+                await self.flush_event_writes(session_id)
                 await self._store_call(self.store.prune_events, session_id, min_ack)
+                self._pruned_through[session_id] = min_ack
             except Exception:
                 log.exception("failed to prune events for session %s", session_id)
 
@@ -395,16 +672,19 @@ class SessionRunner:
         Returns a dict of agent_name -> BaseAgent with established sessions.
         """
         agent_session_ids = await self._store_call(self.store.get_agent_session_ids, session_id)
-        session_data = await self._store_call(self.store.get_session, session_id)
-        working_dir = session_data.get("working_dir", "") if session_data else ""
+        working_dir = await self.get_working_dir(session_id)
+        # Agents already in the pool (added mid-session, or created by a run
+        # that raced the warmup) keep their process; only warm the rest.
+        pooled = self._agent_pools.get(session_id, {})
         agents = create_agents(
-            agent_names,
+            [item for item in agent_names if (item["name"] if isinstance(item, dict) else item) not in pooled],
             parse_timeout=self.parse_timeout,
             hard_timeout=self.hard_timeout,
         )
         # Build participants list for persona-aware prompts
         all_agents = agent_names if agent_names and isinstance(agent_names[0], dict) else None
         participants = [{"name": a["name"], "type": a["type"]} for a in all_agents] if all_agents else None
+        role_by_name = {a["name"]: a.get("role", "") for a in all_agents} if all_agents else {}
         warmed_agents: dict[str, BaseAgent] = {}
 
         async def warm_agent(agent: BaseAgent) -> None:
@@ -416,13 +696,7 @@ class SessionRunner:
                 if working_dir:
                     agent.project_dir = working_dir
 
-                # Resolve role for this agent
-                agent_role = ""
-                if all_agents:
-                    for a in all_agents:
-                        if a["name"] == agent.name:
-                            agent_role = a.get("role", "")
-                            break
+                agent_role = role_by_name.get(agent.name, "")
 
                 # Send session context (participants, role) then ask for [PASS].
                 # Static directives (Share tags, coordination, round model) are
@@ -444,11 +718,14 @@ class SessionRunner:
                 # Still include the agent - it will retry on first real message
                 warmed_agents[agent.name] = agent
 
-        # Run all agents in parallel for faster warmup
-        await asyncio.gather(*[warm_agent(a) for a in agents])
+        # Run all agents in parallel for faster warmup. warm_agent swallows its
+        # own errors, so one failing agent never cancels its siblings.
+        async with asyncio.TaskGroup() as tg:
+            for agent in agents:
+                tg.create_task(warm_agent(agent), name=f"warmup-{session_id}-{agent.name}")
         
         # Store in pool for reuse
-        self._agent_pools[session_id] = warmed_agents
+        self._agent_pools.setdefault(session_id, {}).update(warmed_agents)
         self._warmup_tasks.pop(session_id, None)
         log.info("session %s warmup complete: %d/%d agents ready", 
                  session_id, len(warmed_agents), len(agents))
@@ -471,7 +748,18 @@ class SessionRunner:
         self._warmup_tasks[session_id] = task
 
     async def get_warmed_agents(self, session_id: str, agent_names: list[str] | list[dict]) -> list[BaseAgent]:
-        """Get pre-warmed agents if available, otherwise create fresh ones."""
+        """Get pre-warmed agents if available, otherwise create fresh ones.
+
+        An in-flight warmup is awaited first so its agents are reused instead of
+        spawning a second process per agent.
+        """
+        warmup = self._warmup_tasks.get(session_id)
+        if warmup is not None and not warmup.done():
+            try:
+                await asyncio.shield(warmup)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
         pool = self._agent_pools.setdefault(session_id, {})
         agents = []
         fallback_items = []
@@ -505,16 +793,72 @@ class SessionRunner:
 
         return agents
 
+    async def get_session_agents(self, session_id: str) -> list[dict]:
+        """Return the session's agent personas, reading the store only on a cache miss."""
+        agents = self._session_agents.get(session_id)
+        if agents is None:
+            session = await self._store_call(self.store.get_session, session_id)
+            if session is None:
+                raise KeyError(f"Session not found: {session_id}")
+            agents = self._session_agents[session_id] = session["agent_names"]
+        return agents
+
+    async def get_working_dir(self, session_id: str) -> str:
+        """Return the session's working_dir ("" if unset), reading the store only once."""
+        working_dir = self._working_dirs.get(session_id)
+        if working_dir is None:
+            session = await self._store_call(self.store.get_session, session_id)
+            if session is None:
+                return ""
+            working_dir = self._working_dirs[session_id] = session.get("working_dir", "")
+        return working_dir
+
+    async def get_memory_context(self, working_dir: str, prompt: str, extraction_model: str = "haiku") -> str:
+        """Build the memory context for *prompt* off the event loop, with a short TTL cache."""
+        key = (working_dir, hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest())
+        cached = self._memory_ctx_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < _MEMORY_CONTEXT_TTL:
+            self._memory_ctx_cache.move_to_end(key)
+            return cached[1]
+        mgr = await self._get_memory_manager(working_dir, extraction_model)
+        context = await run_blocking(mgr.build_memory_context, prompt)
+        self._memory_ctx_cache[key] = (time.monotonic(), context)
+        self._memory_ctx_cache.move_to_end(key)
+        while len(self._memory_ctx_cache) > _MEMORY_CONTEXT_CACHE_SIZE:
+            self._memory_ctx_cache.popitem(last=False)
+        return context
+
+    async def _get_memory_manager(self, working_dir: str, extraction_model: str = "haiku") -> MemoryManager:
+        """Return a shared MemoryManager for *working_dir*, opening it off the loop on first use."""
+        now = time.monotonic()
+        managers = self._memory_managers
+        # Evicted managers are only dereferenced, never closed: a finalize
+        # still running in a worker thread may hold one.
+        for stale in [k for k, (_, used) in managers.items() if now - used > _MEMORY_MANAGER_IDLE_TTL]:
+            del managers[stale]
+        key = (working_dir, extraction_model)
+        entry = managers.get(key)
+        if entry is None:
+            mgr = await run_blocking(MemoryManager, Path(working_dir), extraction_model=extraction_model)
+            # A concurrent caller may have opened one meanwhile; keep the first.
+            entry = managers.get(key) or (mgr, now)
+        managers[key] = (entry[0], time.monotonic())
+        return entry[0]
+
+    async def _finalize_memory(self, working_dir: str, session_id: str) -> None:
+        mgr = await self._get_memory_manager(working_dir)
+        await run_blocking(mgr.finalize_session, session_id)
+
     async def add_agent(self, session_id: str, persona: dict) -> None:
         """Add a new agent to a running or idle session."""
+        self._session_agents.pop(session_id, None)
         agents = create_agents(
             [persona],
             parse_timeout=self.parse_timeout,
             hard_timeout=self.hard_timeout,
         )
         agent = agents[0]
-        session_data = await self._store_call(self.store.get_session, session_id)
-        working_dir = session_data.get("working_dir", "") if session_data else ""
+        working_dir = await self.get_working_dir(session_id)
         if working_dir:
             agent.project_dir = working_dir
         pool = self._agent_pools.setdefault(session_id, {})
@@ -525,6 +869,7 @@ class SessionRunner:
 
     async def remove_agent(self, session_id: str, name: str) -> None:
         """Remove an agent from a running or idle session."""
+        self._session_agents.pop(session_id, None)
         room = self._rooms.get(session_id)
         if room:
             room.remove_agent(name)
@@ -538,6 +883,8 @@ class SessionRunner:
         self._cancel_idle_cleanup(session_id)
         self._session_send_timeouts.pop(session_id, None)
         self._last_card_notify.pop(session_id, None)
+        self._session_agents.pop(session_id, None)
+        self._drop_stream_buffers(session_id)
         if cancel_card_phase_tasks:
             self._cancel_next_card_phase(session_id)
         # Cancel any pending warmup
@@ -582,11 +929,18 @@ class SessionRunner:
         self._delegation_responses.pop(session_id, None)
         self._subscribers.pop(session_id, None)
         self._acks.pop(session_id, None)
+        self._ack_low_water.pop(session_id, None)
+        self._ack_expiry.pop(session_id, None)
+        self._pruned_through.pop(session_id, None)
+        self._event_id_blocks.pop(session_id, None)
+        self._event_id_locks.pop(session_id, None)
+        self._working_dirs.pop(session_id, None)
         self._rooms.pop(session_id, None)
         self._round_metrics.pop(session_id, None)
         self._send_failures.pop(session_id, None)
 
         # Delete from database (cascades messages, agent_state, events, cards)
+        await self.flush_event_writes(session_id)
         await self._store_call(self.store.delete_session, session_id)
 
     # -- Card management -----------------------------------------------------
@@ -789,6 +1143,10 @@ class SessionRunner:
         permission_timeout: float | None = None
         if isinstance(perm_timeout, (int, float)) and perm_timeout >= 0:
             permission_timeout = float(perm_timeout)
+        parse_t = config.get("timeouts.parse")
+        parse_timeout = float(parse_t) if isinstance(parse_t, (int, float)) else None
+        hard_t = config.get("timeouts.hard")
+        hard_timeout = float(hard_t) if isinstance(hard_t, (int, float)) and hard_t > 0 else None
         for agent in agents:
             agent_type = agent.agent_type or agent.name
             if not agent.model:
@@ -806,12 +1164,10 @@ class SessionRunner:
                 agent.permission_mode = perm_mode
             if permission_timeout is not None and hasattr(agent, "permission_timeout"):
                 agent.permission_timeout = permission_timeout
-            parse_t = config.get("timeouts.parse")
-            if isinstance(parse_t, (int, float)):
-                agent.parse_timeout = float(parse_t)
-            hard_t = config.get("timeouts.hard")
-            if isinstance(hard_t, (int, float)) and hard_t > 0:
-                agent.hard_timeout = float(hard_t)
+            if parse_timeout is not None:
+                agent.parse_timeout = parse_timeout
+            if hard_timeout is not None:
+                agent.hard_timeout = hard_timeout
 
     def _apply_config_to_session(self, session_id: str, config: dict) -> None:
         """Apply non-agent settings from config to this session."""
@@ -820,20 +1176,23 @@ class SessionRunner:
             self._session_send_timeouts[session_id] = float(send_t)
         else:
             self._session_send_timeouts.pop(session_id, None)
+        timeout = self._session_send_timeouts.get(session_id, self.send_timeout)
+        for ws in self._subscribers.get(session_id, ()):
+            ws.send_timeout = timeout
 
     async def _execute(self, session_id: str, prompt: str, agent_names: list[str] | list[dict], start_round: int = 0) -> None:
-        # Wait for warmup to complete if it's still running
-        if session_id in self._warmup_tasks:
-            try:
-                await self._warmup_tasks[session_id]
-            except asyncio.CancelledError:
-                pass
-
-        # Use pre-warmed agents or create fresh ones
-        agents = await self.get_warmed_agents(session_id, agent_names)
+        # Independent startup lookups run concurrently: pre-warmed agents (waiting
+        # for an in-flight warmup) or fresh ones, settings, working dir, stored
+        # CLI session IDs and message history.
+        agents, config, working_dir, agent_session_ids, history = await asyncio.gather(
+            self.get_warmed_agents(session_id, agent_names),
+            self._get_session_config(session_id),
+            self.get_working_dir(session_id),
+            self._store_call(self.store.get_agent_session_ids, session_id),
+            self._store_call(self.store.get_message_history, session_id),
+        )
 
         # Apply settings from config
-        config = await self._get_session_config(session_id)
         if config:
             self._apply_config_to_session(session_id, config)
             self._apply_config_to_agents(agents, config)
@@ -841,24 +1200,26 @@ class SessionRunner:
         else:
             idle_timeout = self.timeout
 
-        # Memory: start recorder if session has a working_dir
-        from ..memory.recorder import SessionRecorder
+        # Memory: start recorder if session has a working_dir. Transcript writes
+        # (open, append + flush) run in the executor; each is awaited so lines
+        # keep their order.
         recorder: SessionRecorder | None = None
-        session_data = await self._store_call(self.store.get_session, session_id)
-        working_dir = session_data.get("working_dir", "") if session_data else ""
         if working_dir:
             try:
-                recorder = SessionRecorder(Path(working_dir), session_id)
+                recorder = await run_blocking(SessionRecorder, Path(working_dir), session_id)
                 if prompt:
-                    recorder.record_user_message(prompt)
+                    await run_blocking(recorder.record_user_message, prompt)
             except Exception:
                 log.debug("memory recorder init failed for %s", working_dir, exc_info=True)
                 recorder = None
 
+        # Session context so agents can use the card CLI; copied per agent below
+        base_env = {
+            "MULTIAGENTS_SESSION": session_id,
+            "MULTIAGENTS_URL": self._card_api_url,
+            "PATH": _SCRIPTS_DIR + os.pathsep + os.environ.get("PATH", ""),
+        }
         # Ensure all agents have their session IDs from storage
-        agent_session_ids = await self._store_call(self.store.get_agent_session_ids, session_id)
-        scripts_dir = str(Path(__file__).resolve().parent.parent.parent / "scripts")
-        card_api_url = os.environ.get("MULTIAGENTS_URL", "http://localhost:8421")
         for agent in agents:
             if agent.session_id is None:
                 cli_sid = agent_session_ids.get(agent.name)
@@ -867,24 +1228,22 @@ class SessionRunner:
             # Set project directory so agents CWD and prompts reflect it
             if working_dir:
                 agent.project_dir = working_dir
-            # Inject session context so agents can use the card CLI
-            agent.extra_env = {
-                "MULTIAGENTS_SESSION": session_id,
-                "MULTIAGENTS_URL": card_api_url,
-                "PATH": scripts_dir + os.pathsep + os.environ.get("PATH", ""),
-            }
+            agent.extra_env = dict(base_env)
 
         # Memory: compute once before room creation (avoids N*R repeated lookups)
         memory_context = ""
         if working_dir:
             try:
-                from ..memory.manager import MemoryManager
                 extraction_model = config.get("memory.model", "haiku") if config else "haiku"
-                mgr = MemoryManager(Path(working_dir), extraction_model=extraction_model)
-                memory_context = mgr.build_memory_context(prompt or "")
+                memory_context = await self.get_memory_context(working_dir, prompt or "", extraction_model)
             except Exception:
                 log.debug("memory context failed", exc_info=True)
 
+        # agent -> (card dicts the section was built from, section). Card.to_dict
+        # returns the same dict until the card changes, so an identity match
+        # means the board is unchanged for this agent.
+        cards_sections: dict[str, tuple[list[dict], str]] = {}
+
         def _build_extra_context(agent_name: str) -> dict[str, str]:
             sections: dict[str, str] = {}
             if memory_context:
@@ -894,9 +1253,17 @@ class SessionRunner:
             if engine:
                 cards = engine.get_cards()
                 if cards:
-                    section = format_cards_section(
-                        [c.to_dict() for c in cards], agent_name,
-                    )
+                    card_dicts = [c.to_dict() for c in cards]
+                    cached = cards_sections.get(agent_name)
+                    if (
+                        cached is not None
+                        and len(cached[0]) == len(card_dicts)
+                        and all(a is b for a, b in zip(cached[0], card_dicts))
+                    ):
+                        section = cached[1]
+                    else:
+                        section = format_cards_section(card_dicts, agent_name)
+                        cards_sections[agent_name] = (card_dicts, section)
                     if section:
                         sections["cards"] = section
             return sections
@@ -913,53 +1280,73 @@ class SessionRunner:
             working_dir=working_dir, participants=participants, roles=roles,
         )
 
-        existing_messages = await self._store_call(self.store.get_messages, session_id)
-        room.history = [{"role": m["role"], "content": m["content"]} for m in existing_messages]
+        room.history = history
 
         self._rooms[session_id] = room
         round_number = start_round
+        # Metrics of the latest started round, so stream chunks (the bulk of
+        # events) skip the per-session/per-round map lookups.
+        current_metrics: RoundMetrics | None = None
         await self._store_call(self.store.set_running, session_id, True)
 
         try:
             event_source = room.run_persistent(start_round=start_round)
             async for event in event_source:
-                if isinstance(event, RoundStarted):
+                # Event classes are leaves of ChatEvent, so exact type checks
+                # match isinstance without walking the MRO on every event.
+                event_type = type(event)
+                if event_type is AgentStreamChunk:
+                    metrics = current_metrics
+                    if metrics is None or metrics.round_number != event.round_number:
+                        metrics = self._round_metrics.get(session_id, {}).get(event.round_number)
+                    if metrics:
+                        idx = metrics.agent_index.get(event.agent_name)
+                        if idx is None:
+                            # Agent joined mid-round
+                            idx = metrics.agent_index[event.agent_name] = len(metrics.stream_chunks)
+                            metrics.stream_chunks.append(0)
+                        if metrics.stream_chunks[idx] == 0:
+                            metrics.first_chunk_ms[event.agent_name] = (
+                                time.monotonic_ns() - metrics.started_at_ns
+                            ) // 1_000_000
+                        metrics.stream_chunks[idx] += 1
+                    # Persisted and broadcast in coalesced batches
+                    await self.queue_stream_chunk(session_id, event.agent_name, event.round_number, event.text)
+                    continue
+                # Persist buffered chunks before this event's store writes:
+                # appending them afterwards would mark a finished agent as
+                # streaming again.
+                await self._flush_pending_streams(session_id)
+                if event_type is RoundStarted:
                     round_number = event.round_number
-                    await self._store_call(self.store.set_current_round, session_id, round_number)
-                    await self._store_call(self.store.reset_agent_progress, session_id, event.agents, round_number)
-                    self._round_metrics.setdefault(session_id, {})[round_number] = RoundMetrics(
+                    await self._store_call(self.store.start_round, session_id, event.agents, round_number)
+                    current_metrics = RoundMetrics(
                         round_number=round_number,
-                        started_at=time.monotonic(),
-                        stream_chunks={name: 0 for name in event.agents},
-                        first_chunk_ms={},
+                        started_at_ns=time.monotonic_ns(),
+                        agent_index={name: i for i, name in enumerate(event.agents)},
+                        stream_chunks=[0] * len(event.agents),
                     )
+                    self._round_metrics.setdefault(session_id, {})[round_number] = current_metrics
                     if recorder:
-                        recorder.record_round_started(event.round_number, event.agents)
-                elif isinstance(event, AgentCompleted):
+                        await run_blocking(recorder.record_round_started, event.round_number, event.agents)
+                elif event_type is AgentCompleted:
                     resp = event.response
                     await self._store_call(
-                        self.store.save_message,
+                        self.store.save_agent_completed,
                         session_id,
                         resp.agent,
                         resp.response,
                         round_number=event.round_number,
                         passed=event.passed,
-                    )
-                    if resp.session_id:
-                        await self._store_call(self.store.save_agent_session_id, session_id, resp.agent, resp.session_id)
-                    status = "done" if resp.success else "failed"
-                    await self._store_call(
-                        self.store.set_agent_status,
-                        session_id,
-                        resp.agent,
-                        status,
-                        event.round_number,
+                        status="done" if resp.success else "failed",
+                        cli_session_id=resp.session_id or None,
                     )
                     metrics = self._round_metrics.get(session_id, {}).get(event.round_number)
                     if metrics:
                         metrics.latencies_ms[resp.agent] = resp.latency_ms
                     if recorder:
-                        recorder.record_agent_completed(
+                        await run_blocking(
+                            recorder.record_agent_completed,
                             resp.agent, resp.response, event.passed,
                             resp.latency_ms, event.round_number,
                         )
@@ -1009,40 +1396,27 @@ class SessionRunner:
                                     "card phase advance failed session=%s card=%s",
                                     session_id, active_card_id,
                                 )
-                elif isinstance(event, AgentStreamChunk):
-                    await self._store_call(
-                        self.store.append_agent_stream,
-                        session_id,
-                        event.agent_name,
-                        event.round_number,
-                        event.text,
-                    )
-                    metrics = self._round_metrics.get(session_id, {}).get(event.round_number)
-                    if metrics:
-                        if metrics.stream_chunks.get(event.agent_name, 0) == 0:
-                            metrics.first_chunk_ms[event.agent_name] = (
-                                time.monotonic() - metrics.started_at
-                            ) * 1000
-                        metrics.stream_chunks[event.agent_name] = metrics.stream_chunks.get(event.agent_name, 0) + 1
-                elif isinstance(event, RoundEnded):
+                elif event_type is RoundEnded:
                     session_metrics = self._round_metrics.get(session_id, {})
                     metrics = session_metrics.pop(event.round_number, None)
                     if not session_metrics:
                         self._round_metrics.pop(session_id, None)
+                    if current_metrics is metrics:
+                        current_metrics = None
                     if metrics:
-                        duration_ms = (time.monotonic() - metrics.started_at) * 1000
+                        duration_ms = (time.monotonic_ns() - metrics.started_at_ns) // 1_000_000
                         self._log_metric(
                             "round_summary",
                             session_id=session_id,
                             round=metrics.round_number,
-                            duration_ms=round(duration_ms, 2),
-                            stream_chunks=metrics.stream_chunks,
-                            first_chunk_ms={k: round(v, 2) for k, v in metrics.first_chunk_ms.items()},
+                            duration_ms=duration_ms,
+                            stream_chunks=dict(zip(metrics.agent_index, metrics.stream_chunks)),
+                            first_chunk_ms=metrics.first_chunk_ms,
                             agent_latency_ms=metrics.latencies_ms,
                             send_failures=metrics.send_failures,
                         )
                     if recorder:
-                        recorder.record_round_ended(event.round_number, event.all_passed)
+                        await run_blocking(recorder.record_round_ended, event.round_number, event.all_passed)
                     # Parse delegation responses after the round ends
                     delegation_card_id = self._delegation_cards.pop(session_id, None)
                     if delegation_card_id:
@@ -1081,7 +1455,12 @@ class SessionRunner:
             log.exception("session error: %s", session_id)
             await self.broadcast(session_id, {"type": "error", "message": "Internal error"})
         finally:
+            try:
+                await self.flush_stream_chunks(session_id)
+            except Exception:
+                log.exception("failed to flush stream chunks for session %s", session_id)
             await self._store_call(self.store.clear_in_flight, session_id)
+            await self.flush_event_writes(session_id)
             await self._store_call(self.store.clear_events, session_id)
             self._tasks.pop(session_id, None)
             self._rooms.pop(session_id, None)
@@ -1090,17 +1469,14 @@ class SessionRunner:
             self._active_card_tasks.pop(session_id, None)
             self._delegation_cards.pop(session_id, None)
             self._delegation_responses.pop(session_id, None)
-            # Memory: close recorder and finalize episode in background
+            # Memory: close recorder and finalize episode in background. Closing
+            # stays inline so a queued follow-up run cannot append to the
+            # transcript before discussion_ended.
             if recorder:
                 recorder.record_discussion_ended("session_end", round_number)
                 recorder.close()
                 if working_dir:
-                    from ..memory.manager import MemoryManager
-                    _wd = working_dir
-                    _sid = session_id
-                    asyncio.create_task(
-                        asyncio.to_thread(MemoryManager(Path(_wd)).finalize_session, _sid)
-                    )
+                    asyncio.create_task(self._finalize_memory(working_dir, session_id))
             # Clean up warmed agents when discussion ends
             self.cleanup_session(session_id, cancel_card_phase_tasks=False)
             self._start_pending_run(session_id)
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-import json
+import functools
 import sqlite3
 import threading
+import time
 import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+
 _DEFAULT_DB_PATH = Path.home() / ".multiagents" / "multiagents.db"
 
 _SCHEMA = """
@@ -46,7 +51,7 @@ CREATE TABLE IF NOT EXISTS agent_state (
     PRIMARY KEY (session_id, agent_name)
 );
 
-CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id);
+CREATE INDEX IF NOT EXISTS idx_messages_session_created ON messages(session_id, created_at);
 
 CREATE TABLE IF NOT EXISTS session_events (
     id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -58,7 +63,6 @@ CREATE TABLE IF NOT EXISTS session_events (
 );
 
 CREATE UNIQUE INDEX IF NOT EXISTS idx_session_events_session_event ON session_events(session_id, event_id);
-CREATE INDEX IF NOT EXISTS idx_session_events_session ON session_events(session_id);
 
 CREATE TABLE IF NOT EXISTS cards (
     id              TEXT PRIMARY KEY,
@@ -72,7 +76,7 @@ CREATE TABLE IF NOT EXISTS cards (
     coordinator     TEXT NOT NULL DEFAULT '',
     coordination_stage TEXT NOT NULL DEFAULT '',
     previous_phase  TEXT,
-    history         TEXT NOT NULL DEFAULT '[]',
+    history         BLOB NOT NULL DEFAULT '[]',
     created_at      TEXT NOT NULL
 );
 
@@ -82,27 +86,64 @@ CREATE INDEX IF NOT EXISTS idx_cards_session ON cards(session_id);
 _MAX_SESSION_EVENTS = 2000
 
 
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+# Stored in PRAGMA user_version once _ensure_schema has migrated a database;
+# bump it whenever _ensure_schema gains a migration.
+_SCHEMA_VERSION = 1
 
+# Prepared-statement cache per connection, with headroom over the store's
+# distinct statements (sqlite3 defaults to 100).
+_CACHED_STATEMENTS = 512
+# UPDATE ... RETURNING needs SQLite 3.35+.
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
 
-def _parse_agents(raw: str) -> list[dict]:
-    """Parse agent_names column, migrating legacy string lists to persona dicts."""
-    data = json.loads(raw)
+
+# Timestamps are reused within this window, so bursts of writes (e.g. one per
+# streamed chunk) format the datetime once instead of per call.
+_NOW_RESOLUTION = 0.001
+_now_cache: tuple[float, str] = (0.0, "")
+
+
+def _now() -> str:
+    global _now_cache
+    t = time.time()
+    cached_at, cached = _now_cache
+    # A clock stepping backwards falls through and re-formats.
+    if 0.0 <= t - cached_at < _NOW_RESOLUTION:
+        return cached
+    cached = datetime.fromtimestamp(t, timezone.utc).isoformat()
+    # Swapped as one tuple so concurrent callers never see a torn pair.
+    _now_cache = (t, cached)
+    return cached
+
+
+def _dumps(obj: object) -> str:
+    # JSON columns are TEXT; orjson's bytes are valid UTF-8 by construction.
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_agents_cached(raw: str) -> tuple[tuple[str, str, str, str | None], ...]:
+    data = orjson.loads(raw)
     if not data:
-        return []
+        return ()
     if isinstance(data[0], str):
-        return [{"name": name, "type": name, "role": "", "model": None} for name in data]
+        return tuple((name, name, "", None) for name in data)
     # Ensure newly required keys exist on older rows.
-    normalized: list[dict] = []
-    for item in data:
-        normalized.append({
-            "name": item.get("name", item.get("type", "")),
-            "type": item.get("type", ""),
-            "role": item.get("role", ""),
-            "model": item.get("model"),
-        })
-    return normalized
+    return tuple(
+        (item.get("name", item.get("type", "")), item.get("type", ""), item.get("role", ""), item.get("model"))
+        for item in data
+    )
+
+
+def _parse_agents(raw: str) -> list[dict]:
+    """Parse agent_names column, migrating legacy string lists to persona dicts.
+
+    Parsing is memoized on the raw column text; callers get fresh dicts.
+    """
+    return [
+        {"name": name, "type": type_, "role": role, "model": model}
+        for name, type_, role, model in _parse_agents_cached(raw)
+    ]
 
 
 class SessionStore:
@@ -110,85 +151,91 @@ class SessionStore:
         self.db_path = db_path or _DEFAULT_DB_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._lock = threading.Lock()
-        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, cached_statements=_CACHED_STATEMENTS,
+        )
         self._conn.execute("PRAGMA journal_mode=WAL")
         self._conn.execute("PRAGMA foreign_keys=ON")
-        self._conn.executescript(_SCHEMA)
+        # WAL stays consistent with NORMAL; only the last commits can be lost on power failure.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("PRAGMA cache_size=-64000")
+        self._conn.execute("PRAGMA mmap_size=268435456")
         self._ensure_schema()
+        # Reads go through one connection per thread: in WAL mode they see the
+        # last committed state without waiting on the writer's lock.
+        self._local = threading.local()
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), cached_statements=_CACHED_STATEMENTS)
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+        yield conn
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """Hold the lock for one transaction: commit on success, roll back on error."""
+        with self._lock:
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
 
     def _ensure_schema(self) -> None:
-        """Ensure newer columns/tables exist for older databases."""
-        with self._lock:
-            cur = self._conn.execute("PRAGMA table_info(sessions)")
+        """Create missing tables and bring older databases up to date."""
+        with self._tx() as conn:
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version >= _SCHEMA_VERSION:
+                return
+            conn.executescript(_SCHEMA)
+            cur = conn.execute("PRAGMA table_info(sessions)")
             session_cols = {row[1] for row in cur.fetchall()}
             if "is_running" not in session_cols:
-                self._conn.execute("ALTER TABLE sessions ADD COLUMN is_running INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE sessions ADD COLUMN is_running INTEGER NOT NULL DEFAULT 0")
             if "current_round" not in session_cols:
-                self._conn.execute("ALTER TABLE sessions ADD COLUMN current_round INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE sessions ADD COLUMN current_round INTEGER NOT NULL DEFAULT 0")
             if "last_event_id" not in session_cols:
-                self._conn.execute("ALTER TABLE sessions ADD COLUMN last_event_id INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE sessions ADD COLUMN last_event_id INTEGER NOT NULL DEFAULT 0")
             if "is_paused" not in session_cols:
-                self._conn.execute("ALTER TABLE sessions ADD COLUMN is_paused INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE sessions ADD COLUMN is_paused INTEGER NOT NULL DEFAULT 0")
             if "last_event_at" not in session_cols:
-                self._conn.execute("ALTER TABLE sessions ADD COLUMN last_event_at TEXT NOT NULL DEFAULT ''")
+                conn.execute("ALTER TABLE sessions ADD COLUMN last_event_at TEXT NOT NULL DEFAULT ''")
             if "working_dir" not in session_cols:
-                self._conn.execute("ALTER TABLE sessions ADD COLUMN working_dir TEXT NOT NULL DEFAULT ''")
+                conn.execute("ALTER TABLE sessions ADD COLUMN working_dir TEXT NOT NULL DEFAULT ''")
             if "config" not in session_cols:
-                self._conn.execute("ALTER TABLE sessions ADD COLUMN config TEXT NOT NULL DEFAULT '{}'")
+                conn.execute("ALTER TABLE sessions ADD COLUMN config TEXT NOT NULL DEFAULT '{}'")
 
-            cur = self._conn.execute("PRAGMA table_info(agent_state)")
+            cur = conn.execute("PRAGMA table_info(agent_state)")
             agent_cols = {row[1] for row in cur.fetchall()}
             if "last_round" not in agent_cols:
-                self._conn.execute("ALTER TABLE agent_state ADD COLUMN last_round INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE agent_state ADD COLUMN last_round INTEGER NOT NULL DEFAULT 0")
             if "status" not in agent_cols:
-                self._conn.execute("ALTER TABLE agent_state ADD COLUMN status TEXT NOT NULL DEFAULT 'idle'")
+                conn.execute("ALTER TABLE agent_state ADD COLUMN status TEXT NOT NULL DEFAULT 'idle'")
             if "stream_text" not in agent_cols:
-                self._conn.execute("ALTER TABLE agent_state ADD COLUMN stream_text TEXT NOT NULL DEFAULT ''")
+                conn.execute("ALTER TABLE agent_state ADD COLUMN stream_text TEXT NOT NULL DEFAULT ''")
             if "updated_at" not in agent_cols:
-                self._conn.execute("ALTER TABLE agent_state ADD COLUMN updated_at TEXT NOT NULL DEFAULT ''")
-
-            self._conn.execute(
-                "CREATE TABLE IF NOT EXISTS session_events ("
-                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
-                "session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE, "
-                "event_id INTEGER NOT NULL, "
-                "type TEXT NOT NULL, "
-                "data TEXT NOT NULL, "
-                "created_at TEXT NOT NULL)"
-            )
-            self._conn.execute(
-                "CREATE UNIQUE INDEX IF NOT EXISTS idx_session_events_session_event "
-                "ON session_events(session_id, event_id)"
-            )
-            self._conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_session_events_session "
-                "ON session_events(session_id)"
-            )
-
-            self._conn.execute(
-                "CREATE TABLE IF NOT EXISTS cards ("
-                "id TEXT PRIMARY KEY, "
-                "session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE, "
-                "title TEXT NOT NULL, "
-                "description TEXT NOT NULL DEFAULT '', "
-                "status TEXT NOT NULL DEFAULT 'backlog', "
-                "planner TEXT NOT NULL DEFAULT '', "
-                "implementer TEXT NOT NULL DEFAULT '', "
-                "reviewer TEXT NOT NULL DEFAULT '', "
-                "coordinator TEXT NOT NULL DEFAULT '', "
-                "coordination_stage TEXT NOT NULL DEFAULT '', "
-                "previous_phase TEXT, "
-                "history TEXT NOT NULL DEFAULT '[]', "
-                "created_at TEXT NOT NULL)"
-            )
-            self._conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_cards_session ON cards(session_id)"
-            )
-            self._conn.commit()
+                conn.execute("ALTER TABLE agent_state ADD COLUMN updated_at TEXT NOT NULL DEFAULT ''")
+
+            # idx_messages_session_created (see _SCHEMA) serves get_messages'
+            # ORDER BY without a sort and covers every session_id-only lookup
+            # the old index did.
+            conn.execute("DROP INDEX IF EXISTS idx_messages_session")
+            # The unique (session_id, event_id) index already serves every
+            # session_id lookup; a separate one only doubles insert work.
+            conn.execute("DROP INDEX IF EXISTS idx_session_events_session")
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
 
     def list_sessions(self) -> list[dict]:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._reader() as conn:
+            cur = conn.execute(
                 "SELECT id, title, agent_names, updated_at FROM sessions ORDER BY updated_at DESC"
             )
             return [
@@ -200,7 +247,7 @@ class SessionStore:
         session_id = uuid.uuid4().hex
         now = _now()
         title = "New Chat"
-        config_json = json.dumps(config or {})
+        config_json = _dumps(config or {})
         agents_data: list[dict] = []
         for item in agent_names:
             if isinstance(item, str):
@@ -212,22 +259,20 @@ class SessionStore:
                     "role": item.get("role", ""),
                     "model": item.get("model"),
                 })
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "INSERT INTO sessions (id, title, agent_names, created_at, updated_at, working_dir, config) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (session_id, title, json.dumps(agents_data), now, now, working_dir, config_json),
+                (session_id, title, _dumps(agents_data), now, now, working_dir, config_json),
+            )
+            conn.executemany(
+                "INSERT INTO agent_state (session_id, agent_name) VALUES (?, ?)",
+                [(session_id, agent["name"]) for agent in agents_data],
             )
-            for agent in agents_data:
-                self._conn.execute(
-                    "INSERT INTO agent_state (session_id, agent_name) VALUES (?, ?)",
-                    (session_id, agent["name"]),
-                )
-            self._conn.commit()
         return {"id": session_id, "title": title, "agent_names": agents_data, "working_dir": working_dir, "config": config or {}}
 
     def get_session(self, session_id: str) -> dict | None:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._reader() as conn:
+            cur = conn.execute(
                 "SELECT id, title, agent_names, created_at, updated_at, is_running, is_paused, current_round, "
                 "last_event_id, last_event_at, working_dir, config FROM sessions WHERE id = ?",
                 (session_id,),
@@ -235,7 +280,7 @@ class SessionStore:
             row = cur.fetchone()
             if row is None:
                 return None
-            agent_cur = self._conn.execute(
+            agent_cur = conn.execute(
                 "SELECT agent_name, cli_session_id FROM agent_state WHERE session_id = ?",
                 (session_id,),
             )
@@ -246,16 +291,15 @@ class SessionStore:
             "is_running": bool(row[5]), "is_paused": bool(row[6]),
             "current_round": row[7], "last_event_id": row[8], "last_event_at": row[9],
             "agent_sessions": agent_sessions, "working_dir": row[10],
-            "config": json.loads(row[11]) if row[11] else {},
+            "config": orjson.loads(row[11]) if row[11] else {},
         }
 
     def update_title(self, session_id: str, title: str) -> None:
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "UPDATE sessions SET title = ?, updated_at = ? WHERE id = ?",
                 (title, _now(), session_id),
             )
-            self._conn.commit()
 
     def save_message(
         self,
@@ -267,34 +311,62 @@ class SessionStore:
     ) -> dict:
         msg_id = uuid.uuid4().hex
         now = _now()
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "INSERT INTO messages (id, session_id, role, content, round_number, passed, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
                 (msg_id, session_id, role, content, round_number, int(passed), now),
             )
-            self._conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id))
-            self._conn.commit()
+            conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id))
+        return {"id": msg_id, "created_at": now}
+
+    def save_agent_completed(
+        self,
+        session_id: str,
+        agent_name: str,
+        content: str,
+        round_number: int,
+        passed: bool,
+        status: str,
+        cli_session_id: str | None = None,
+    ) -> dict:
+        """Record an agent's finished turn in one transaction.
+
+        Saves the response message, sets the agent's status and, when given,
+        its CLI session ID (save_message + set_agent_status + save_agent_session_id).
+        """
+        msg_id = uuid.uuid4().hex
+        now = _now()
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT INTO messages (id, session_id, role, content, round_number, passed, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (msg_id, session_id, agent_name, content, round_number, int(passed), now),
+            )
+            conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id))
+            conn.execute(
+                "UPDATE agent_state SET last_round = ?, status = ?, updated_at = ?, "
+                "cli_session_id = COALESCE(?, cli_session_id) "
+                "WHERE session_id = ? AND agent_name = ?",
+                (round_number, status, now, cli_session_id, session_id, agent_name),
+            )
         return {"id": msg_id, "created_at": now}
 
     def set_running(self, session_id: str, running: bool) -> None:
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "UPDATE sessions SET is_running = ?, updated_at = ? WHERE id = ?",
                 (int(running), _now(), session_id),
             )
-            self._conn.commit()
 
     def set_current_round(self, session_id: str, round_number: int) -> None:
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "UPDATE sessions SET current_round = ?, updated_at = ? WHERE id = ?",
                 (round_number, _now(), session_id),
             )
-            self._conn.commit()
 
     def get_session_state(self, session_id: str) -> dict | None:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._reader() as conn:
+            cur = conn.execute(
                 "SELECT is_running, is_paused, current_round, last_event_id, last_event_at FROM sessions WHERE id = ?",
                 (session_id,),
             )
@@ -310,39 +382,59 @@ class SessionStore:
             }
 
     def reset_agent_progress(self, session_id: str, agent_names: list[str], round_number: int) -> None:
+        with self._tx():
+            self._reset_agent_progress(session_id, agent_names, round_number, _now())
+
+    def start_round(self, session_id: str, agent_names: list[str], round_number: int) -> None:
+        """set_current_round + reset_agent_progress in one transaction."""
         now = _now()
-        with self._lock:
-            for name in agent_names:
-                self._conn.execute(
-                    "UPDATE agent_state SET last_round = ?, status = ?, stream_text = ?, updated_at = ? "
-                    "WHERE session_id = ? AND agent_name = ?",
-                    (round_number, "streaming", "", now, session_id, name),
-                )
-            self._conn.commit()
+        with self._tx() as conn:
+            conn.execute(
+                "UPDATE sessions SET current_round = ?, updated_at = ? WHERE id = ?",
+                (round_number, now, session_id),
+            )
+            self._reset_agent_progress(session_id, agent_names, round_number, now)
+
+    def _reset_agent_progress(self, session_id: str, agent_names: list[str], round_number: int, now: str) -> None:
+        if not agent_names:
+            return
+        # One statement for the whole roster; each roster size is its own
+        # cached statement.
+        placeholders = ", ".join("?" * len(agent_names))
+        self._conn.execute(
+            "UPDATE agent_state SET last_round = ?, status = ?, stream_text = ?, updated_at = ? "
+            f"WHERE session_id = ? AND agent_name IN ({placeholders})",
+            (round_number, "streaming", "", now, session_id, *agent_names),
+        )
 
     def append_agent_stream(self, session_id: str, agent_name: str, round_number: int, chunk: str) -> None:
+        self.append_agent_streams(session_id, [(agent_name, round_number, chunk)])
+
+    def append_agent_streams(self, session_id: str, chunks: list[tuple[str, int, str]]) -> None:
+        """Append ``(agent_name, round_number, chunk)`` stream text in a single transaction."""
         now = _now()
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.executemany(
                 "UPDATE agent_state SET last_round = ?, status = ?, stream_text = stream_text || ?, updated_at = ? "
                 "WHERE session_id = ? AND agent_name = ?",
-                (round_number, "streaming", chunk, now, session_id, agent_name),
+                [
+                    (round_number, "streaming", chunk, now, session_id, agent_name)
+                    for agent_name, round_number, chunk in chunks
+                ],
             )
-            self._conn.commit()
 
     def set_agent_status(self, session_id: str, agent_name: str, status: str, round_number: int) -> None:
         now = _now()
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "UPDATE agent_state SET last_round = ?, status = ?, updated_at = ? "
                 "WHERE session_id = ? AND agent_name = ?",
                 (round_number, status, now, session_id, agent_name),
             )
-            self._conn.commit()
 
     def get_agent_progress(self, session_id: str) -> dict[str, dict]:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._reader() as conn:
+            cur = conn.execute(
                 "SELECT agent_name, last_round, status, stream_text FROM agent_state WHERE session_id = ?",
                 (session_id,),
             )
@@ -353,91 +445,116 @@ class SessionStore:
 
     def clear_in_flight(self, session_id: str) -> None:
         now = _now()
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "UPDATE sessions SET is_running = 0, is_paused = 0, current_round = 0, updated_at = ? WHERE id = ?",
                 (now, session_id),
             )
-            self._conn.execute(
+            conn.execute(
                 "UPDATE agent_state SET last_round = 0, status = ?, stream_text = ?, updated_at = ? WHERE session_id = ?",
                 ("idle", "", now, session_id),
             )
-            self._conn.commit()
 
     def reserve_event_id(self, session_id: str) -> int:
-        with self._lock:
-            cur = self._conn.execute(
+        return self.reserve_event_ids(session_id, 1)
+
+    def reserve_event_ids(self, session_id: str, count: int) -> int:
+        """Reserve ``count`` consecutive event ids and return the first one."""
+        with self._tx() as conn:
+            if _HAS_RETURNING:
+                # fetchall, not fetchone: the statement must run to completion
+                # or it keeps the write lock past the commit.
+                rows = conn.execute(
+                    "UPDATE sessions SET last_event_id = last_event_id + ? WHERE id = ? RETURNING last_event_id",
+                    (count, session_id),
+                ).fetchall()
+                if not rows:
+                    raise ValueError(f"Unknown session: {session_id}")
+                return rows[0][0] - count + 1
+            row = conn.execute(
                 "SELECT last_event_id FROM sessions WHERE id = ?",
                 (session_id,),
-            )
-            row = cur.fetchone()
+            ).fetchone()
             if row is None:
                 raise ValueError(f"Unknown session: {session_id}")
-            next_id = row[0] + 1
-            self._conn.execute(
+            conn.execute(
                 "UPDATE sessions SET last_event_id = ? WHERE id = ?",
-                (next_id, session_id),
+                (row[0] + count, session_id),
             )
-            self._conn.commit()
-            return next_id
+            return row[0] + 1
+
+    def save_event(self, session_id: str, event_id: int, data: dict, payload: str | None = None) -> None:
+        """Persist a broadcast event; ``payload`` is its JSON encoding if already known."""
+        if payload is None:
+            payload = orjson.dumps(data).decode()
+        self.save_events(session_id, [(event_id, data, payload)])
 
-    def save_event(self, session_id: str, event_id: int, data: dict) -> None:
+    def save_events(self, session_id: str, events: list[tuple[int, dict, str]]) -> None:
+        """Persist ``(event_id, data, payload)`` triples in a single transaction."""
+        if not events:
+            return
         now = _now()
-        payload = json.dumps(data)
-        event_type = data.get("type", "unknown")
-        with self._lock:
-            self._conn.execute(
+        rows = [
+            (session_id, event_id, data.get("type", "unknown"), payload, now)
+            for event_id, data, payload in events
+        ]
+        with self._tx() as conn:
+            conn.executemany(
                 "INSERT OR REPLACE INTO session_events (session_id, event_id, type, data, created_at) "
                 "VALUES (?, ?, ?, ?, ?)",
-                (session_id, event_id, event_type, payload, now),
+                rows,
             )
-            self._conn.execute(
+            conn.execute(
                 "UPDATE sessions SET last_event_at = ?, updated_at = ? WHERE id = ?",
                 (now, now, session_id),
             )
-            self._conn.execute(
-                "DELETE FROM session_events WHERE session_id = ? AND event_id NOT IN ("
-                "SELECT event_id FROM session_events WHERE session_id = ? ORDER BY event_id DESC LIMIT ?"
-                ")",
-                (session_id, session_id, _MAX_SESSION_EVENTS),
+            # Keep the newest _MAX_SESSION_EVENTS ids: a range delete on the
+            # (session_id, event_id) index instead of a NOT IN subquery.
+            conn.execute(
+                "DELETE FROM session_events WHERE session_id = ? AND event_id <= ?",
+                (session_id, max(row[1] for row in rows) - _MAX_SESSION_EVENTS),
             )
-            self._conn.commit()
 
     def get_events_since(self, session_id: str, after_event_id: int, limit: int = 500) -> list[dict]:
-        with self._lock:
-            cur = self._conn.execute(
+        return [event for event, _ in self.get_event_payloads_since(session_id, after_event_id, limit)]
+
+    def get_event_payloads_since(
+        self, session_id: str, after_event_id: int, limit: int = 500,
+    ) -> list[tuple[dict, str]]:
+        """Like get_events_since, but keep each stored JSON payload alongside its dict."""
+        with self._reader() as conn:
+            cur = conn.execute(
                 "SELECT data FROM session_events WHERE session_id = ? AND event_id > ? "
                 "ORDER BY event_id ASC LIMIT ?",
                 (session_id, after_event_id, limit),
             )
-            rows = cur.fetchall()
-        events = []
-        for (payload,) in rows:
-            try:
-                events.append(json.loads(payload))
-            except (json.JSONDecodeError, TypeError, ValueError):
-                continue
+            # Parse rows as the cursor yields them rather than materializing
+            # every row first; only the parsed events are held at once.
+            events = []
+            for (payload,) in cur:
+                try:
+                    events.append((orjson.loads(payload), payload))
+                except (TypeError, ValueError):
+                    continue
         return events
 
     def prune_events(self, session_id: str, up_to_event_id: int) -> None:
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "DELETE FROM session_events WHERE session_id = ? AND event_id <= ?",
                 (session_id, up_to_event_id),
             )
-            self._conn.commit()
 
     def clear_events(self, session_id: str) -> None:
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "DELETE FROM session_events WHERE session_id = ?",
                 (session_id,),
             )
-            self._conn.commit()
 
     def get_status(self, session_id: str) -> dict | None:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._reader() as conn:
+            cur = conn.execute(
                 "SELECT is_running, is_paused, current_round, last_event_at FROM sessions WHERE id = ?",
                 (session_id,),
             )
@@ -452,8 +569,8 @@ class SessionStore:
             }
 
     def get_messages(self, session_id: str) -> list[dict]:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._reader() as conn:
+            cur = conn.execute(
                 "SELECT id, role, content, round_number, passed, created_at FROM messages WHERE session_id = ? ORDER BY created_at",
                 (session_id,),
             )
@@ -462,17 +579,25 @@ class SessionStore:
                 for row in cur.fetchall()
             ]
 
+    def get_message_history(self, session_id: str) -> list[dict]:
+        """Messages as ``{"role", "content"}`` dicts, the shape ChatRoom.history uses."""
+        with self._reader() as conn:
+            cur = conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY created_at",
+                (session_id,),
+            )
+            return [{"role": role, "content": content} for role, content in cur.fetchall()]
+
     def save_agent_session_id(self, session_id: str, agent_name: str, cli_session_id: str) -> None:
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "UPDATE agent_state SET cli_session_id = ? WHERE session_id = ? AND agent_name = ?",
                 (cli_session_id, session_id, agent_name),
             )
-            self._conn.commit()
 
     def get_agent_session_ids(self, session_id: str) -> dict[str, str | None]:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._reader() as conn:
+            cur = conn.execute(
                 "SELECT agent_name, cli_session_id FROM agent_state WHERE session_id = ?",
                 (session_id,),
             )
@@ -481,38 +606,37 @@ class SessionStore:
     def update_agents(self, session_id: str, agents: list[dict]) -> None:
         """Update the agent list for a session."""
         now = _now()
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "UPDATE sessions SET agent_names = ?, updated_at = ? WHERE id = ?",
-                (json.dumps(agents), now, session_id),
+                (_dumps(agents), now, session_id),
             )
-            self._conn.commit()
 
     def add_agent_state(self, session_id: str, agent_name: str) -> None:
         """Add agent_state row for a newly added agent."""
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "INSERT OR IGNORE INTO agent_state (session_id, agent_name) VALUES (?, ?)",
                 (session_id, agent_name),
             )
-            self._conn.commit()
 
     def remove_agent_state(self, session_id: str, agent_name: str) -> None:
         """Remove agent_state row for a removed agent."""
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "DELETE FROM agent_state WHERE session_id = ? AND agent_name = ?",
                 (session_id, agent_name),
             )
-            self._conn.commit()
 
     # -- Card persistence ---------------------------------------------------
 
     def save_card(self, session_id: str, card_dict: dict) -> None:
         """Upsert a full card state."""
-        history = json.dumps(card_dict.get("history", []))
-        with self._lock:
-            self._conn.execute(
+        # Bound as a BLOB so the orjson bytes are stored without a str
+        # round trip; orjson.loads reads either form back.
+        history = orjson.dumps(card_dict.get("history", []), option=orjson.OPT_NON_STR_KEYS)
+        with self._tx() as conn:
+            conn.execute(
                 "INSERT OR REPLACE INTO cards "
                 "(id, session_id, title, description, status, planner, implementer, reviewer, "
                 "coordinator, coordination_stage, previous_phase, history, created_at) "
@@ -533,12 +657,11 @@ class SessionStore:
                     card_dict.get("created_at", _now()),
                 ),
             )
-            self._conn.commit()
 
     def get_cards(self, session_id: str) -> list[dict]:
         """Load all cards for a session."""
-        with self._lock:
-            cur = self._conn.execute(
+        with self._reader() as conn:
+            cur = conn.execute(
                 "SELECT id, title, description, status, planner, implementer, reviewer, "
                 "coordinator, coordination_stage, previous_phase, history, created_at "
                 "FROM cards WHERE session_id = ? ORDER BY created_at",
@@ -548,8 +671,8 @@ class SessionStore:
         results = []
         for row in rows:
             try:
-                history = json.loads(row[10])
-            except (json.JSONDecodeError, TypeError):
+                history = orjson.loads(row[10])
+            except (orjson.JSONDecodeError, TypeError):
                 history = []
             results.append({
                 "id": row[0],
@@ -568,15 +691,13 @@ class SessionStore:
         return results
 
     def delete_card(self, session_id: str, card_id: str) -> None:
-        with self._lock:
-            self._conn.execute(
+        with self._tx() as conn:
+            conn.execute(
                 "DELETE FROM cards WHERE id = ? AND session_id = ?",
                 (card_id, session_id),
             )
-            self._conn.commit()
 
     def delete_session(self, session_id: str) -> None:
         """Delete a session and all related data (cascades via FK)."""
-        with self._lock:
-            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
-            self._conn.commit()
+        with self._tx() as conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
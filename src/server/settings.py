@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-import json
+import copy
 import sqlite3
 import threading
 from pathlib import Path
 from typing import Any
 
+import orjson
+
 _DEFAULT_DB_PATH = Path.home() / ".multiagents" / "multiagents.db"
 
 DEFAULTS: dict[str, Any] = {
@@ -39,10 +41,22 @@ DEFAULTS: dict[str, Any] = {
     "permissions.timeout": 120,
 }
 
+def _copy(value: Any) -> Any:
+    # Decoded rows are cached and shared between readers; hand out copies of
+    # containers so a caller mutating one cannot change every later read.
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+def _dumps(value: Any) -> bytes:
+    # Values are bound as BLOBs: orjson's bytes go in and come back out
+    # without a UTF-8 str round trip on either side.
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS settings (
     key   TEXT PRIMARY KEY,
-    value TEXT NOT NULL
+    value BLOB NOT NULL
 );
 """
 
@@ -54,50 +68,71 @@ class SettingsStore:
         self._lock = threading.Lock()
         self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
         self._conn.executescript(_SCHEMA)
+        # Decoded stored rows; this store is the only writer, so it is
+        # reloaded only after one of its own writes.
+        self._rows: dict[str, Any] | None = None
+        # DEFAULTS overlaid with _rows, rebuilt together with it.
+        self._merged: dict[str, Any] = {}
 
-    def get(self, key: str, default: Any = ...) -> Any:
+    def _load(self) -> None:
+        # Caller holds self._lock.
+        cur = self._conn.execute("SELECT key, value FROM settings")
+        self._rows = {row[0]: orjson.loads(row[1]) for row in cur.fetchall()}
+        self._merged = DEFAULTS | self._rows
+
+    def _stored(self) -> dict[str, Any]:
         with self._lock:
-            cur = self._conn.execute(
-                "SELECT value FROM settings WHERE key = ?", (key,)
-            )
-            row = cur.fetchone()
-        if row is not None:
-            return json.loads(row[0])
+            if self._rows is None:
+                self._load()
+            return self._rows
+
+    def _effective(self) -> dict[str, Any]:
+        with self._lock:
+            if self._rows is None:
+                self._load()
+            return self._merged
+
+    def get(self, key: str, default: Any = ...) -> Any:
+        rows = self._stored()
+        if key in rows:
+            return _copy(rows[key])
         if default is not ...:
             return default
-        return DEFAULTS.get(key)
+        return _copy(DEFAULTS.get(key))
 
     def set(self, key: str, value: Any) -> None:
-        encoded = json.dumps(value)
+        encoded = _dumps(value)
         with self._lock:
             self._conn.execute(
                 "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
                 (key, encoded),
             )
             self._conn.commit()
+            self._rows = None
 
     def delete(self, key: str) -> None:
         with self._lock:
             self._conn.execute("DELETE FROM settings WHERE key = ?", (key,))
             self._conn.commit()
+            self._rows = None
 
     def get_all(self) -> dict[str, Any]:
-        with self._lock:
-            cur = self._conn.execute("SELECT key, value FROM settings")
-            rows = {row[0]: json.loads(row[1]) for row in cur.fetchall()}
-        result = dict(DEFAULTS)
-        result.update(rows)
-        return result
+        # The snapshot's containers are the cached rows and DEFAULTS' own
+        # values; copy them along with the dict.
+        return {key: _copy(value) for key, value in self._effective().items()}
 
     def set_many(self, updates: dict[str, Any]) -> None:
         with self._lock:
             for key, value in updates.items():
                 self._conn.execute(
                     "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
-                    (key, json.dumps(value)),
+                    (key, _dumps(value)),
                 )
             self._conn.commit()
+            self._rows = None
 
     def get_effective(
         self,
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # optional: clients fall back to JSON text frames
+    msgpack = None
+
+JSON_SUBPROTOCOL = "json"
+MSGPACK_SUBPROTOCOL = "msgpack"
+
+
+def negotiate_subprotocol(offered: list[str]) -> str | None:
+    """Pick the wire format from the client's ``Sec-WebSocket-Protocol`` offer.
+
+    Clients that offer nothing keep the legacy JSON text frames.
+    """
+    if MSGPACK_SUBPROTOCOL in offered and msgpack is not None:
+        return MSGPACK_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in offered:
+        return JSON_SUBPROTOCOL
+    return None
+
+
+def encode_json(data: object) -> str:
+    # Text frames need ``str``; orjson's bytes are valid UTF-8 by construction.
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def decode_json(raw: str | bytes) -> object:
+    return orjson.loads(raw)
+
+
+# msgpack.packb builds a throwaway Packer per call; reuse one instead. Only the
+# event loop thread encodes frames, so sharing it is safe.
+_packer = msgpack.Packer(use_bin_type=True, autoreset=True) if msgpack is not None else None
+
+
+def encode_msgpack(data: dict) -> bytes:
+    return _packer.pack(data)
+
+
+def decode_msgpack(raw: bytes) -> object:
+    return msgpack.unpackb(raw, raw=False)
+
+
+class Frame:
+    """A broadcast payload encoded at most once per wire format.
+
+    Fanout hands the same ``Frame`` to every subscriber, so N subscribers on
+    the same format share a single encode instead of serializing N times.
+    """
+
+    __slots__ = ("data", "_json", "_msgpack")
+
+    def __init__(self, data: dict, json: str | None = None) -> None:
+        self.data = data
+        # Callers holding an existing JSON encoding of *data* (e.g. a stored
+        # event) pass it in so it is never re-serialized.
+        self._json: str | None = json
+        self._msgpack: bytes | None = None
+
+    def json(self) -> str:
+        if self._json is None:
+            self._json = encode_json(self.data)
+        return self._json
+
+    def msgpack(self) -> bytes:
+        if self._msgpack is None:
+            self._msgpack = encode_msgpack(self.data)
+        return self._msgpack
+
+
+# {"type": "batch", "events": [...]} with the events spliced in pre-encoded,
+# so batching a burst never re-serializes the individual frames.
+_JSON_BATCH_HEAD = '{"type":"batch","events":['
+_MSGPACK_BATCH_HEAD = b"\x82\xa4type\xa5batch\xa6events"  # fixmap(2), fixstr keys
+
+
+def encode_json_batch(frames: list[Frame]) -> str:
+    return _JSON_BATCH_HEAD + ",".join(frame.json() for frame in frames) + "]}"
+
+
+def encode_msgpack_batch(frames: list[Frame]) -> bytes:
+    n = len(frames)
+    array_head = bytes((0x90 | n,)) if n < 16 else b"\xdc" + n.to_bytes(2, "big")
+    return b"".join([_MSGPACK_BATCH_HEAD, array_head, *(frame.msgpack() for frame in frames)])
@@ -1,19 +1,52 @@
-from collections.abc import AsyncIterator
+"""Tests for BaseAgent.stream against a stubbed persistent process.
+
+Cases share no mutable state (the event tuples are only replayed), so the
+module is safe to distribute with pytest-xdist (``pytest -n auto``).
+"""
+
+from collections.abc import AsyncIterator, Sequence
 
 import pytest
 
 from src.agents.base import AgentNotice, AgentResponse, BaseAgent
 from src.agents.protocols.base import ProcessRestarted, TextDelta, TurnComplete
 
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+_EVENTS_SUCCESS_FLAG = (
+    TextDelta(text="partial output"),
+    TurnComplete(session_id="sid-1", success=False, error="turn failed"),
+)
+_EVENTS_NO_TEXT = (TurnComplete(session_id="sid-1", success=False, error="upstream error"),)
+_EVENTS_RESTART = (
+    ProcessRestarted(reason="broken pipe", retry=1),
+    TurnComplete(session_id="sid-1", success=True),
+)
+
+
+class _ListAsyncIter:
+    """Replays a list through ``async for`` without an async generator frame."""
+
+    def __init__(self, events: Sequence[object]) -> None:
+        self._next = iter(events).__next__
+
+    def __aiter__(self) -> "_ListAsyncIter":
+        return self
+
+    async def __anext__(self) -> object:
+        try:
+            return self._next()
+        except StopIteration:
+            raise StopAsyncIteration from None
+
 
 class _StubPersistent:
-    def __init__(self, events: list[object]) -> None:
+    def __init__(self, events: Sequence[object]) -> None:
         self._events = events
         self._session_id = "sid-1"
 
-    async def send_and_stream(self, prompt: str) -> AsyncIterator[object]:
-        for event in self._events:
-            yield event
+    def send_and_stream(self, prompt: str) -> AsyncIterator[object]:
+        return _ListAsyncIter(self._events)
 
     def get_stderr(self) -> str:
         return ""
@@ -30,61 +63,47 @@ class _DummyAgent(BaseAgent):
         return self._stub
 
 
-@pytest.mark.asyncio
-async def test_base_agent_uses_turn_complete_success_flag() -> None:
-    agent = _DummyAgent(
-        _StubPersistent(
-            [
-                TextDelta(text="partial output"),
-                TurnComplete(session_id="sid-1", success=False, error="turn failed"),
-            ]
-        )
-    )
-
-    items = []
+@pytest.fixture(
+    scope="module",
+    params=[
+        {
+            "events": _EVENTS_SUCCESS_FLAG,
+            "response": {"success": False, "response": "partial output", "session_id": "sid-1"},
+            "notice": [],
+        },
+        {
+            "events": _EVENTS_NO_TEXT,
+            "response": {"success": False, "response": "upstream error"},
+            "notice": [],
+        },
+        {
+            "events": _EVENTS_RESTART,
+            "response": {"success": True},
+            "notice": ["persistent process restarted", "retry 1"],
+        },
+    ],
+    ids=["turn_complete_success_flag", "turn_error_when_no_text", "notice_on_persistent_restart"],
+)
+def agent_case(request) -> dict:
+    # _StubPersistent only replays the events and nothing mutates them, so
+    # one case dict can serve the whole module.
+    return request.param
+
+
+async def test_base_agent_stream(agent_case: dict) -> None:
+    agent = _DummyAgent(_StubPersistent(agent_case["events"]))
+
+    collected: dict[type, list] = {}
     async for item in agent.stream("hello"):
-        items.append(item)
-
-    response = next(i for i in items if isinstance(i, AgentResponse))
-    assert response.success is False
-    assert response.response == "partial output"
-    assert response.session_id == "sid-1"
-
-
-@pytest.mark.asyncio
-async def test_base_agent_uses_turn_error_when_no_text() -> None:
-    agent = _DummyAgent(
-        _StubPersistent(
-            [
-                TurnComplete(session_id="sid-1", success=False, error="upstream error"),
-            ]
-        )
-    )
-
-    items = []
-    async for item in agent.stream("hello"):
-        items.append(item)
-
-    response = next(i for i in items if isinstance(i, AgentResponse))
-    assert response.success is False
-    assert response.response == "upstream error"
-
-
-@pytest.mark.asyncio
-async def test_base_agent_emits_notice_when_persistent_process_restarts() -> None:
-    agent = _DummyAgent(
-        _StubPersistent(
-            [
-                ProcessRestarted(reason="broken pipe", retry=1),
-                TurnComplete(session_id="sid-1", success=True),
-            ]
-        )
-    )
-
-    items = []
-    async for item in agent.stream("hello"):
-        items.append(item)
-
-    notice = next(i for i in items if isinstance(i, AgentNotice))
-    assert "persistent process restarted" in notice.message
-    assert "retry 1" in notice.message
+        collected.setdefault(type(item), []).append(item)
+
+    response = collected[AgentResponse][0]
+    for field, expected in agent_case["response"].items():
+        assert getattr(response, field) == expected, field
+    notices = collected.get(AgentNotice, [])
+    if agent_case["notice"]:
+        assert len(notices) == 1
+        for fragment in agent_case["notice"]:
+            assert fragment in notices[0].message
+    else:
+        assert notices == []
@@ -124,6 +124,27 @@ class TestCRUD:
         engine = _make_engine()
         assert engine.get_cards() == []
 
+    def test_update_card_rejects_private_field(self):
+        engine = _make_engine()
+        card = _make_card(engine)
+        with pytest.raises(ValueError, match="no field"):
+            engine.update_card(card.id, _dict_cache=None)
+
+    def test_to_dict_cached_until_card_changes(self):
+        engine = _make_engine()
+        card = _make_card(engine)
+        first = card.to_dict()
+        assert card.to_dict() is first
+
+        engine.update_card(card.id, title="Renamed")
+        renamed = card.to_dict()
+        assert renamed is not first
+        assert renamed["title"] == "Renamed"
+
+        engine.start_card(card.id)
+        engine.on_agent_completed(card.id, "claude", "Here is the plan.")
+        assert card.to_dict()["history"][-1]["content"] == "Here is the plan."
+
 
 # ---------------------------------------------------------------------------
 # get_cards_for_agent
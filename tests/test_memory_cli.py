@@ -45,3 +45,12 @@ def test_main_parser_backward_compat():
     args = parser.parse_args(["--port", "9000"])
     assert args.command is None  # no subcommand = serve
     assert args.port == 9000
+
+
+def test_main_parser_loop_choice():
+    from src.main import _select_event_loop, build_parser
+
+    parser = build_parser()
+    assert parser.parse_args([]).loop == "auto"
+    assert parser.parse_args(["--loop", "asyncio"]).loop == "asyncio"
+    assert _select_event_loop("asyncio") == "asyncio"
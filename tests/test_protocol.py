@@ -0,0 +1,26 @@
+from src.chat import events
+from src.chat.events import AgentStreamChunk, ChatEvent
+from src.server.protocol import _BUILDERS, event_to_dict
+
+
+def test_every_chat_event_has_a_builder():
+    event_types = {
+        obj for obj in vars(events).values()
+        if isinstance(obj, type) and issubclass(obj, ChatEvent) and obj is not ChatEvent
+    }
+    assert event_types == set(_BUILDERS)
+
+
+def test_event_to_dict_stream_chunk_and_unknown():
+    chunk = AgentStreamChunk(agent_name="claude", round_number=2, text="hi")
+    assert event_to_dict(chunk) == {"type": "agent_stream", "agent": "claude", "round": 2, "chunk": "hi"}
+    assert event_to_dict(ChatEvent()) == {"type": "unknown"}
+
+
+def test_event_to_dict_uses_shared_timestamp():
+    from src.chat.events import AgentNotice, UserMessageReceived
+
+    ts = 1_767_225_600_000
+    assert event_to_dict(UserMessageReceived(text="hi"), ts=ts)["created_at"] == ts
+    assert event_to_dict(AgentNotice(agent_name="claude", message="reset"), ts=ts)["created_at"] == ts
+    assert isinstance(event_to_dict(UserMessageReceived(text="hi"))["created_at"], int)
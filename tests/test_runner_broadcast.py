@@ -0,0 +1,587 @@
+import asyncio
+import json
+
+import pytest
+
+from src.server.outbox import Outbox
+from src.server.runner import SessionRunner
+from src.server.sessions import SessionStore
+
+
+class _FakeWebSocket:
+    def __init__(self, fail: bool = False) -> None:
+        self.sent: list[dict] = []
+        self.closed_with: int | None = None
+        self._fail = fail
+
+    async def send_text(self, data: str) -> None:
+        if self._fail:
+            raise RuntimeError("socket gone")
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+
+
+async def _drain() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_enqueues_to_every_subscriber_in_order(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    sockets = [_FakeWebSocket(), _FakeWebSocket()]
+    outboxes = [Outbox(ws) for ws in sockets]
+    for outbox in outboxes:
+        outbox.start()
+        runner.subscribe(session["id"], outbox)
+
+    assert await runner.broadcast(session["id"], {"type": "round_started", "round": 1}) == 2
+    assert await runner.broadcast(session["id"], {"type": "round_ended", "round": 1}) == 2
+    await _drain()
+
+    for ws in sockets:
+        assert [m["type"] for m in ws.sent] == ["round_started", "round_ended"]
+        assert [m["event_id"] for m in ws.sent] == [1, 2]
+    for outbox in outboxes:
+        await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_subscriber_after_send_failure(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    broken = _FakeWebSocket(fail=True)
+    outbox = Outbox(broken)
+    outbox.start()
+    runner.subscribe(session["id"], outbox)
+
+    await runner.broadcast(session["id"], {"type": "round_started", "round": 1})
+    await _drain()
+    assert outbox.closed
+    assert broken.closed_with == 1011
+
+    assert await runner.broadcast(session["id"], {"type": "round_ended", "round": 1}) == 0
+    assert session["id"] not in runner._subscribers
+
+
+@pytest.mark.asyncio
+async def test_subscriber_snapshot_only_changes_on_membership_change(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    first, second = Outbox(_FakeWebSocket()), Outbox(_FakeWebSocket())
+    runner.subscribe(session["id"], first)
+    runner.subscribe(session["id"], first)
+    runner.subscribe(session["id"], second)
+    snapshot = runner._subscribers[session["id"]]
+    assert snapshot == (first, second)
+
+    await runner.broadcast(session["id"], {"type": "round_started", "round": 1})
+    assert runner._subscribers[session["id"]] is snapshot
+
+    runner.unsubscribe(session["id"], first)
+    assert runner._subscribers[session["id"]] == (second,)
+    runner.unsubscribe(session["id"], second)
+    assert session["id"] not in runner._subscribers
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_only_dead_subscribers(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    outboxes = [Outbox(_FakeWebSocket()) for _ in range(3)]
+    for outbox in outboxes:
+        runner.subscribe(session["id"], outbox)
+    outboxes[1].closed = True
+
+    assert await runner.broadcast(session["id"], {"type": "round_started", "round": 1}) == 2
+    assert runner._subscribers[session["id"]] == (outboxes[0], outboxes[2])
+    assert set(runner._acks[session["id"]]) == {outboxes[0], outboxes[2]}
+    assert runner._send_failures[session["id"]] == 1
+
+
+@pytest.mark.asyncio
+async def test_outbox_overflow_marks_subscriber_dead():
+    ws = _FakeWebSocket()
+    outbox = Outbox(ws, maxsize=2)
+
+    assert outbox.send_nowait({"type": "a"})
+    assert outbox.send_nowait({"type": "b"})
+    assert not outbox.send_nowait({"type": "c"})
+    assert outbox.closed
+    await _drain()
+    assert ws.closed_with == 1011
+
+
+@pytest.mark.asyncio
+async def test_outbox_drops_subscriber_when_send_stalls():
+    class _StalledWebSocket(_FakeWebSocket):
+        async def send_text(self, data: str) -> None:
+            await asyncio.Event().wait()
+
+    ws = _StalledWebSocket()
+    outbox = Outbox(ws, send_timeout=0.05)
+    outbox.start()
+    outbox.send_nowait({"type": "a"})
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if ws.closed_with is not None:
+            break
+
+    assert outbox.closed
+    assert ws.closed_with == 1011
+
+
+@pytest.mark.asyncio
+async def test_broadcast_encodes_once_and_persists_same_payload(tmp_path, monkeypatch):
+    from src.server import wire
+
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    sockets = [_FakeWebSocket() for _ in range(3)]
+    outboxes = [Outbox(ws) for ws in sockets]
+    for outbox in outboxes:
+        outbox.start()
+        runner.subscribe(session["id"], outbox)
+
+    calls = 0
+    real_encode = wire.encode_json
+
+    def counting_encode(data: dict) -> str:
+        nonlocal calls
+        calls += 1
+        return real_encode(data)
+
+    monkeypatch.setattr(wire, "encode_json", counting_encode)
+    await runner.broadcast(session["id"], {"type": "card_deleted", "card_id": "c1"})
+    await _drain()
+
+    assert calls == 1
+    assert all(ws.sent == [{"type": "card_deleted", "card_id": "c1", "event_id": 1}] for ws in sockets)
+    await runner.flush_event_writes(session["id"])
+    assert store.get_events_since(session["id"], 0) == [{"type": "card_deleted", "card_id": "c1", "event_id": 1}]
+    for outbox in outboxes:
+        await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_for_persistence(tmp_path, monkeypatch):
+    import threading
+
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    ws = _FakeWebSocket()
+    outbox = Outbox(ws)
+    outbox.start()
+    runner.subscribe(session["id"], outbox)
+    release = threading.Event()
+    batches: list[list[int]] = []
+    real_save_events = store.save_events
+
+    def slow_save_events(session_id, events):
+        release.wait(5)
+        batches.append([event_id for event_id, _, _ in events])
+        real_save_events(session_id, events)
+
+    monkeypatch.setattr(store, "save_events", slow_save_events)
+    for i in range(3):
+        await runner.broadcast(session["id"], {"type": "round_started", "round": i})
+    await _drain()
+    assert [m["event_id"] for m in ws.sent] == [1, 2, 3]
+
+    release.set()
+    await runner.flush_event_writes(session["id"])
+    # Ids come from an in-process block, so the burst never yields to the
+    # writer and lands in one transaction.
+    assert batches == [[1, 2, 3]]
+    assert [e["event_id"] for e in store.get_events_since(session["id"], 0)] == [1, 2, 3]
+    await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_event_ids_are_reserved_from_the_store_in_blocks(tmp_path, monkeypatch):
+    from src.server.runner import _EVENT_ID_BLOCK
+
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    reservations: list[int] = []
+    real_reserve = store.reserve_event_ids
+
+    def recording_reserve(session_id, count):
+        first = real_reserve(session_id, count)
+        reservations.append(first)
+        return first
+
+    monkeypatch.setattr(store, "reserve_event_ids", recording_reserve)
+    ids = [await runner._next_event_id(session["id"]) for _ in range(_EVENT_ID_BLOCK + 1)]
+    assert ids == list(range(1, _EVENT_ID_BLOCK + 2))
+    assert reservations == [1, _EVENT_ID_BLOCK + 1]
+
+    # A fresh runner (e.g. after a restart) never reuses a reserved id.
+    restarted = SessionRunner(store=store)
+    assert await restarted._next_event_id(session["id"]) == 2 * _EVENT_ID_BLOCK + 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_publishers_share_one_block_refill(tmp_path, monkeypatch):
+    import time
+
+    from src.server.runner import _EVENT_ID_BLOCK
+
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    for _ in range(_EVENT_ID_BLOCK - 1):
+        await runner._next_event_id(session["id"])
+    real_reserve = store.reserve_event_ids
+    delays = iter([0.05, 0.0, 0.0, 0.0])
+
+    def slow_reserve(session_id, count):
+        # Earlier reservations finish last, as a racing refill could.
+        first = real_reserve(session_id, count)
+        time.sleep(next(delays))
+        return first
+
+    monkeypatch.setattr(store, "reserve_event_ids", slow_reserve)
+    # One id left in the block, then concurrent publishers cross the boundary.
+    await asyncio.gather(*(runner.broadcast(session["id"], {"type": "x", "n": n}) for n in range(4)))
+    await runner.flush_event_writes(session["id"])
+
+    ids = [e["event_id"] for e in store.get_events_since(session["id"], 0)]
+    assert ids == list(range(_EVENT_ID_BLOCK, _EVENT_ID_BLOCK + 4))
+    assert await runner._next_event_id(session["id"]) == _EVENT_ID_BLOCK + 4
+
+
+@pytest.mark.asyncio
+async def test_replay_sends_stored_payload_without_reencoding(tmp_path, monkeypatch):
+    from src.server import wire
+
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    await runner.broadcast(session["id"], {"type": "round_started", "round": 1})
+    await runner.broadcast(session["id"], {"type": "round_ended", "round": 1})
+
+    def fail_encode(data: dict) -> str:
+        raise AssertionError("replay re-encoded a stored event")
+
+    monkeypatch.setattr(wire, "encode_json", fail_encode)
+    ws = _FakeWebSocket()
+    outbox = Outbox(ws)
+    outbox.start()
+    await runner.replay_events(session["id"], 1, outbox)
+    await _drain()
+
+    assert ws.sent == [{"type": "round_ended", "round": 1, "event_id": 2}]
+    await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_outbox_drains_queued_burst_in_order():
+    ws = _FakeWebSocket()
+    outbox = Outbox(ws)
+    for i in range(40):
+        assert outbox.send_nowait({"type": "agent_stream", "seq": i})
+    outbox.start()
+    await _drain()
+
+    assert [m["seq"] for m in ws.sent] == list(range(40))
+    await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_ack_prunes_only_when_low_water_mark_advances(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store)
+    outbox = Outbox(_FakeWebSocket())
+    runner.subscribe(session["id"], outbox)
+    for i in range(3):
+        await runner.broadcast(session["id"], {"type": "round_started", "round": i})
+
+    prunes: list[int] = []
+    real_prune = store.prune_events
+
+    def counting_prune(session_id: str, up_to: int) -> None:
+        prunes.append(up_to)
+        real_prune(session_id, up_to)
+
+    store.prune_events = counting_prune  # type: ignore[method-assign]
+    await runner.ack(session["id"], outbox, 2)
+    await runner.ack(session["id"], outbox, 2)
+    await runner.ack(session["id"], outbox, 1)
+    await runner.ack(session["id"], outbox, 3)
+
+    assert prunes == [2, 3]
+    assert store.get_events_since(session["id"], 0) == []
+    await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_subscriber_ack_does_not_hold_back_pruning(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store, ack_ttl=0.05)
+    idle, active = Outbox(_FakeWebSocket()), Outbox(_FakeWebSocket())
+    runner.subscribe(session["id"], idle)
+    runner.subscribe(session["id"], active)
+    for i in range(2):
+        await runner.broadcast(session["id"], {"type": "round_started", "round": i})
+
+    await runner.ack(session["id"], active, 2)
+    await runner.flush_event_writes(session["id"])
+    assert len(store.get_events_since(session["id"], 0)) == 2
+
+    await asyncio.sleep(0.1)
+    await runner.ack(session["id"], active, 2)
+    assert list(runner._acks[session["id"]]) == [active]
+    assert store.get_events_since(session["id"], 0) == []
+
+
+@pytest.mark.asyncio
+async def test_refreshed_ack_survives_its_original_expiry(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store, ack_ttl=0.05)
+    outbox = Outbox(_FakeWebSocket())
+    runner.subscribe(session["id"], outbox)
+
+    await asyncio.sleep(0.03)
+    await runner.ack(session["id"], outbox, 1)
+    await asyncio.sleep(0.03)
+    runner._prune_stale_acks(session["id"])
+
+    assert list(runner._acks[session["id"]]) == [outbox]
+    assert len(runner._ack_expiry[session["id"]]) == 1
+
+@pytest.mark.asyncio
+async def test_ack_expiry_heap_stays_bounded_across_resubscribes(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store, ack_ttl=0.02)
+    steady, flapping = Outbox(_FakeWebSocket()), Outbox(_FakeWebSocket())
+    runner.subscribe(session["id"], steady)
+
+    for _ in range(50):
+        runner.subscribe(session["id"], flapping)
+        runner.unsubscribe(session["id"], flapping)
+        # Leftovers are compacted once they reach 2x the live acks (2 here).
+        assert len(runner._ack_expiry[session["id"]]) <= 4
+    runner.subscribe(session["id"], flapping)
+
+    # Past the TTL, refreshed acks keep exactly one live entry each.
+    for _ in range(3):
+        await asyncio.sleep(0.03)
+        await runner.ack(session["id"], steady, 0)
+        await runner.ack(session["id"], flapping, 0)
+    assert len(runner._ack_expiry[session["id"]]) == 2
+    assert set(runner._acks[session["id"]]) == {steady, flapping}
+
+
+
+def test_ack_low_water_tracks_brute_force_minimum(tmp_path):
+    import random
+
+    runner = SessionRunner(store=SessionStore(tmp_path / "test.db"))
+    outboxes = [Outbox(_FakeWebSocket()) for _ in range(4)]
+    rng = random.Random(7)
+    for _ in range(500):
+        ws = rng.choice(outboxes)
+        op = rng.random()
+        if op < 0.15:
+            runner.subscribe("s", ws)
+        elif op < 0.3:
+            runner._drop_acks("s", [ws])
+        else:
+            runner._set_ack("s", ws, rng.randint(0, 40), 0.0)
+        acks = runner._acks.get("s")
+        if acks:
+            assert runner._min_ack("s") == min(state.event_id for state in acks.values())
+
+
+@pytest.mark.asyncio
+async def test_stream_chunks_coalesce_and_flush_before_other_events(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store, stream_coalesce_ms=1000)
+    ws = _FakeWebSocket()
+    outbox = Outbox(ws)
+    outbox.start()
+    runner.subscribe(session["id"], outbox)
+
+    for text in ("Hel", "lo", " world"):
+        await runner.queue_stream_chunk(session["id"], "claude", 1, text)
+    await runner.broadcast(session["id"], {"type": "round_ended", "round": 1})
+    await _drain()
+
+    assert [(m["type"], m.get("chunk")) for m in ws.sent] == [
+        ("agent_stream", "Hello world"),
+        ("round_ended", None),
+    ]
+    assert [m["event_id"] for m in ws.sent] == [1, 2]
+    progress = store.get_agent_progress(session["id"])
+    assert progress["claude"]["stream_text"] == "Hello world"
+    await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_buffered_chunks_are_persisted_before_agent_completion(tmp_path, monkeypatch):
+    from src.agents.base import AgentResponse
+    from src.chat.events import AgentCompleted, AgentStreamChunk, RoundEnded, RoundStarted
+
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store, stream_coalesce_ms=60_000)
+    seen: list[dict] = []
+
+    class _FakeRoom:
+        def __init__(self, *args, **kwargs) -> None:
+            self.history: list[dict] = []
+
+        async def run_persistent(self, start_round: int = 0):
+            yield RoundStarted(round_number=1, agents=["claude"])
+            yield AgentStreamChunk(agent_name="claude", round_number=1, text="hel")
+            yield AgentStreamChunk(agent_name="claude", round_number=1, text="lo")
+            response = AgentResponse(agent="claude", response="hello", success=True, latency_ms=1.0)
+            yield AgentCompleted(agent_name="claude", round_number=1, response=response, passed=False)
+            # Resumed only once the runner has fully handled AgentCompleted.
+            seen.append(store.get_agent_progress(session["id"])["claude"])
+            yield RoundEnded(round_number=1, all_passed=False)
+
+    async def _no_agents(session_id, agent_names):
+        return []
+
+    monkeypatch.setattr("src.server.runner.ChatRoom", _FakeRoom)
+    monkeypatch.setattr(runner, "get_warmed_agents", _no_agents)
+    await runner._execute(session["id"], "", ["claude"])
+
+    assert seen == [{"last_round": 1, "status": "done", "stream_text": "hello"}]
+
+
+@pytest.mark.asyncio
+async def test_stream_flush_persists_all_agents_in_one_store_call(tmp_path, monkeypatch):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude", "codex"])
+    runner = SessionRunner(store=store, stream_coalesce_ms=1000)
+    calls: list[list[tuple[str, int, str]]] = []
+    real_append = store.append_agent_streams
+
+    def recording_append(session_id, chunks):
+        calls.append(chunks)
+        real_append(session_id, chunks)
+
+    monkeypatch.setattr(store, "append_agent_streams", recording_append)
+    await runner.queue_stream_chunk(session["id"], "claude", 1, "a")
+    await runner.queue_stream_chunk(session["id"], "codex", 1, "b")
+    await runner.queue_stream_chunk(session["id"], "claude", 1, "c")
+    await runner.flush_stream_chunks(session["id"])
+
+    assert calls == [[("claude", 1, "ac"), ("codex", 1, "b")]]
+    progress = store.get_agent_progress(session["id"])
+    assert progress["claude"]["stream_text"] == "ac"
+    assert progress["codex"]["stream_text"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_stream_chunks_flush_on_timer(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store, stream_coalesce_ms=5)
+    ws = _FakeWebSocket()
+    outbox = Outbox(ws)
+    outbox.start()
+    runner.subscribe(session["id"], outbox)
+
+    await runner.queue_stream_chunk(session["id"], "claude", 1, "a")
+    await runner.queue_stream_chunk(session["id"], "claude", 1, "b")
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if ws.sent:
+            break
+
+    assert [m["chunk"] for m in ws.sent] == ["ab"]
+    await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_chunks_flush_early_when_buffer_fills(tmp_path):
+    from src.server.runner import _STREAM_FLUSH_MAX_CHUNKS
+
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    runner = SessionRunner(store=store, stream_coalesce_ms=60_000)
+    ws = _FakeWebSocket()
+    outbox = Outbox(ws)
+    outbox.start()
+    runner.subscribe(session["id"], outbox)
+
+    for _ in range(_STREAM_FLUSH_MAX_CHUNKS):
+        await runner.queue_stream_chunk(session["id"], "claude", 1, "x")
+    await _drain()
+
+    assert [m["chunk"] for m in ws.sent] == ["x" * _STREAM_FLUSH_MAX_CHUNKS]
+    assert session["id"] not in runner._stream_flush_handles
+    await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_batching_outbox_wraps_queued_burst_in_one_frame():
+    ws = _FakeWebSocket()
+    outbox = Outbox(ws, batch=True)
+    for i in range(3):
+        outbox.send_nowait({"type": "agent_stream", "seq": i})
+    outbox.start()
+    await _drain()
+    outbox.send_nowait({"type": "round_ended"})
+    await _drain()
+
+    assert ws.sent[0]["type"] == "batch"
+    assert [m["seq"] for m in ws.sent[0]["events"]] == [0, 1, 2]
+    assert ws.sent[1] == {"type": "round_ended"}
+    await outbox.close()
+
+
+def test_log_metric_emits_one_json_object(tmp_path, caplog):
+    runner = SessionRunner(store=SessionStore(tmp_path / "test.db"))
+    with caplog.at_level("INFO", logger="multiagents"):
+        runner._log_metric("ws_send_failure", session_id="s1", event_type="round_started")
+
+    line = next(r.getMessage() for r in caplog.records if r.getMessage().startswith("metric "))
+    payload = json.loads(line.removeprefix("metric "))
+    assert payload["metric"] == "ws_send_failure"
+    assert payload["service"] == "multiagents"
+    assert {"version", "ts"} <= payload.keys()
+    assert payload["session_id"] == "s1"
+
+
+@pytest.mark.asyncio
+async def test_store_calls_run_on_dedicated_store_threads(tmp_path):
+    import threading
+
+    runner = SessionRunner(store=SessionStore(tmp_path / "test.db"))
+    name = await runner._store_call(lambda: threading.current_thread().name)
+    assert name.startswith("multiagents-store")
+
+
+def test_log_send_failure_matches_generic_metric_shape(tmp_path, caplog):
+    runner = SessionRunner(store=SessionStore(tmp_path / "test.db"))
+    with caplog.at_level("INFO", logger="multiagents"):
+        runner._log_send_failure("s1", "round_started")
+        runner._log_metric("ws_send_failure", session_id="s1", event_type="round_started")
+
+    fast, generic = (
+        json.loads(r.getMessage().removeprefix("metric "))
+        for r in caplog.records if r.getMessage().startswith("metric ")
+    )
+    fast.pop("ts")
+    generic.pop("ts")
+    assert fast == generic
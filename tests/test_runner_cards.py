@@ -61,3 +61,99 @@ async def test_get_warmed_agents_caches_fallback_agents_in_session_pool(tmp_path
         assert session_id in runner._agent_pools
         assert runner._agent_pools[session_id]["claude"] is first[0]
         assert second[0] is first[0]
+
+
+@pytest.mark.asyncio
+async def test_get_warmed_agents_waits_for_inflight_warmup(tmp_path):
+    import asyncio
+
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    session_id = session["id"]
+    runner = SessionRunner(store=store)
+
+    class _FakeAgent:
+        name = "claude"
+
+    warmed = _FakeAgent()
+
+    async def fake_warmup(sid, agent_names):
+        await asyncio.sleep(0.01)
+        runner._agent_pools.setdefault(sid, {})["claude"] = warmed
+        runner._warmup_tasks.pop(sid, None)
+
+    runner.warmup_agents = fake_warmup  # type: ignore[method-assign]
+    runner.start_warmup(session_id, ["claude"])
+
+    with patch("src.server.runner.create_agents") as mocked_create:
+        agents = await runner.get_warmed_agents(session_id, ["claude"])
+
+    mocked_create.assert_not_called()
+    assert agents == [warmed]
+
+
+@pytest.mark.asyncio
+async def test_get_session_agents_caches_until_agent_removed(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude", "codex"])
+    runner = SessionRunner(store=store)
+
+    agents = await runner.get_session_agents(session["id"])
+    assert [a["name"] for a in agents] == ["claude", "codex"]
+
+    store.update_agents(session["id"], [a for a in agents if a["name"] != "codex"])
+    assert await runner.get_session_agents(session["id"]) is agents
+
+    await runner.remove_agent(session["id"], "codex")
+    assert [a["name"] for a in await runner.get_session_agents(session["id"])] == ["claude"]
+
+    with pytest.raises(KeyError):
+        await runner.get_session_agents("missing")
+
+
+@pytest.mark.asyncio
+async def test_get_working_dir_reads_store_once(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"], working_dir=str(tmp_path))
+    runner = SessionRunner(store=store)
+
+    with patch.object(store, "get_session", wraps=store.get_session) as spy:
+        assert await runner.get_working_dir(session["id"]) == str(tmp_path)
+        assert await runner.get_working_dir(session["id"]) == str(tmp_path)
+    assert spy.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_context_is_cached_per_working_dir_and_prompt(tmp_path):
+    runner = SessionRunner(store=SessionStore(tmp_path / "test.db"))
+    calls = []
+
+    class FakeManager:
+        def __init__(self, project_root, extraction_model="haiku"):
+            self.project_root = project_root
+
+        def build_memory_context(self, prompt):
+            calls.append((str(self.project_root), prompt))
+            return f"ctx:{prompt}"
+
+    with patch("src.server.runner.MemoryManager", FakeManager):
+        assert await runner.get_memory_context("/proj", "fix it") == "ctx:fix it"
+        assert await runner.get_memory_context("/proj", "fix it") == "ctx:fix it"
+        assert await runner.get_memory_context("/other", "fix it") == "ctx:fix it"
+    assert calls == [("/proj", "fix it"), ("/other", "fix it")]
+
+
+@pytest.mark.asyncio
+async def test_memory_manager_is_reused_per_working_dir(tmp_path):
+    runner = SessionRunner(store=SessionStore(tmp_path / "test.db"))
+    created = []
+
+    class FakeManager:
+        def __init__(self, project_root, extraction_model="haiku"):
+            created.append((project_root, extraction_model))
+
+    with patch("src.server.runner.MemoryManager", FakeManager):
+        first = await runner._get_memory_manager(str(tmp_path))
+        assert await runner._get_memory_manager(str(tmp_path)) is first
+        assert await runner._get_memory_manager(str(tmp_path), "sonnet") is not first
+    assert len(created) == 2
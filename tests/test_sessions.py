@@ -0,0 +1,156 @@
+import sqlite3
+
+import pytest
+
+from src.server.sessions import SessionStore
+
+
+def test_save_agent_completed_writes_message_and_status_together(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude", "codex"])
+    store.start_round(session["id"], ["claude", "codex"], 2)
+
+    msg = store.save_agent_completed(
+        session["id"], "claude", "done it", round_number=2, passed=False, status="done", cli_session_id="cli-1"
+    )
+    store.save_agent_completed(session["id"], "codex", "[PASS]", round_number=2, passed=True, status="failed")
+
+    messages = store.get_messages(session["id"])
+    assert [(m["role"], m["id"]) for m in messages][0] == ("claude", msg["id"])
+    assert store.get_message_history(session["id"]) == [
+        {"role": "claude", "content": "done it"},
+        {"role": "codex", "content": "[PASS]"},
+    ]
+    progress = store.get_agent_progress(session["id"])
+    assert progress["claude"]["status"] == "done"
+    assert progress["codex"]["status"] == "failed"
+    assert store.get_agent_session_ids(session["id"]) == {"claude": "cli-1", "codex": None}
+    assert store.get_session(session["id"])["current_round"] == 2
+
+
+def test_store_transaction_rolls_back_on_error(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+
+    with pytest.raises(RuntimeError):
+        with store._tx() as conn:
+            conn.execute("UPDATE sessions SET title = ? WHERE id = ?", ("Half-written", session["id"]))
+            raise RuntimeError("boom")
+
+    # Without the rollback the open write would be visible here and committed
+    # by the next unrelated write.
+    store.set_running(session["id"], True)
+    assert store.get_session(session["id"])["title"] == "New Chat"
+
+
+def test_failed_stream_append_leaves_no_open_transaction(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude", "codex"])
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        # The second row cannot be bound, after the first has been applied.
+        store.append_agent_streams(session["id"], [("claude", 1, "partial"), ("codex", 1, object())])
+
+    assert not store._conn.in_transaction
+    assert store.get_agent_progress(session["id"])["claude"]["stream_text"] == ""
+
+
+@pytest.mark.parametrize("has_returning", [True, False])
+def test_reserve_event_ids_hands_out_consecutive_blocks(tmp_path, monkeypatch, has_returning):
+    import src.server.sessions as sessions_module
+
+    monkeypatch.setattr(sessions_module, "_HAS_RETURNING", has_returning)
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+
+    assert store.reserve_event_ids(session["id"], 64) == 1
+    assert store.reserve_event_ids(session["id"], 1) == 65
+    assert store.reserve_event_id(session["id"]) == 66
+    with pytest.raises(ValueError):
+        store.reserve_event_ids("missing", 1)
+
+
+def test_save_events_keeps_only_the_newest_events(tmp_path, monkeypatch):
+    import src.server.sessions as sessions_module
+
+    monkeypatch.setattr(sessions_module, "_MAX_SESSION_EVENTS", 5)
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    for start in (1, 4, 7):
+        store.save_events(session["id"], [(i, {"type": "x", "i": i}, f'{{"type":"x","i":{i}}}') for i in range(start, start + 3)])
+
+    assert [e["i"] for e in store.get_events_since(session["id"], 0)] == [5, 6, 7, 8, 9]
+
+
+def test_store_reads_do_not_wait_on_the_write_lock(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude"])
+    store.save_message(session["id"], "user", "hi")
+
+    with store._lock:  # a writer mid-transaction
+        assert store.get_session(session["id"])["id"] == session["id"]
+        assert [m["content"] for m in store.get_messages(session["id"])] == ["hi"]
+
+
+def test_now_reuses_the_formatted_timestamp_within_the_resolution(monkeypatch):
+    from types import SimpleNamespace
+
+    import src.server.sessions as sessions_module
+
+    clock = iter([100.0, 100.0004, 100.002, 99.0])
+    monkeypatch.setattr(sessions_module, "time", SimpleNamespace(time=lambda: next(clock)))
+    monkeypatch.setattr(sessions_module, "_now_cache", (0.0, ""))
+
+    first = sessions_module._now()
+    assert sessions_module._now() is first
+    later = sessions_module._now()
+    assert later > first
+    assert sessions_module._now() < later  # clock stepped back: re-formatted
+
+
+def test_parsed_agent_lists_are_not_shared_between_reads(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude", "codex"])
+
+    first = store.get_session(session["id"])["agent_names"]
+    first[0]["role"] = "mutated"
+    first.pop()
+    assert store.get_session(session["id"])["agent_names"] == [
+        {"name": "claude", "type": "claude", "role": "", "model": None},
+        {"name": "codex", "type": "codex", "role": "", "model": None},
+    ]
+
+
+def test_schema_migrations_run_once_per_database(tmp_path):
+    import src.server.sessions as sessions_module
+
+    db_path = tmp_path / "test.db"
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE sessions (id TEXT PRIMARY KEY, title TEXT NOT NULL, agent_names TEXT NOT NULL, created_at TEXT NOT NULL, updated_at TEXT NOT NULL)")
+    legacy.execute("CREATE TABLE agent_state (session_id TEXT NOT NULL, agent_name TEXT NOT NULL, cli_session_id TEXT, PRIMARY KEY (session_id, agent_name))")
+    legacy.commit()
+    legacy.close()
+
+    store = SessionStore(db_path)
+    session = store.create_session(agent_names=["claude"])
+    assert store.get_session(session["id"])["current_round"] == 0
+    assert store._conn.execute("PRAGMA user_version").fetchone()[0] == sessions_module._SCHEMA_VERSION
+
+    traced: list[str] = []
+    store._conn.set_trace_callback(traced.append)
+    store._ensure_schema()
+    assert not any("table_info" in sql for sql in traced)
+
+
+def test_reset_agent_progress_only_touches_the_named_agents(tmp_path):
+    store = SessionStore(tmp_path / "test.db")
+    session = store.create_session(agent_names=["claude", "codex", "kimi"])
+    store.reset_agent_progress(session["id"], [], 1)
+    store.reset_agent_progress(session["id"], ["claude", "kimi"], 3)
+
+    progress = store.get_agent_progress(session["id"])
+    assert {name: (p["last_round"], p["status"]) for name, p in progress.items()} == {
+        "claude": (3, "streaming"),
+        "codex": (0, "idle"),
+        "kimi": (3, "streaming"),
+    }
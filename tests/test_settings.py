@@ -43,6 +43,58 @@ def test_set_many(tmp_path):
     assert store.get("timeouts.parse") == 60
 
 
+def test_reads_are_cached_until_a_write(tmp_path):
+    store = SettingsStore(tmp_path / "test.db")
+    store.set("timeouts.idle", 900)
+    assert store.get_all()["timeouts.idle"] == 900
+    # A raw write behind the store's back is not seen until the store itself writes.
+    with store._lock:
+        store._conn.execute("UPDATE settings SET value = '5' WHERE key = 'timeouts.idle'")
+        store._conn.commit()
+    assert store.get("timeouts.idle") == 900
+    store.set_many({"timeouts.parse": 60})
+    assert store.get("timeouts.idle") == 5
+    store.delete("timeouts.parse")
+    assert store.get("timeouts.parse") == 1200
+
+
+def test_get_all_returns_a_fresh_copy_of_the_merged_settings(tmp_path):
+    store = SettingsStore(tmp_path / "test.db")
+    store.set("timeouts.idle", 900)
+    first = store.get_all()
+    first["timeouts.idle"] = 1
+    assert store.get_all()["timeouts.idle"] == 900
+    assert store.get_effective({"timeouts.idle": 5})["timeouts.idle"] == 5
+    assert store.get_all()["timeouts.idle"] == 900
+    store.delete("timeouts.idle")
+    assert store.get_all()["timeouts.idle"] == DEFAULTS["timeouts.idle"]
+
+    store.get_all()["agents.enabled"].append("extra")
+    store.get_effective()["agents.enabled"].append("extra")
+    store.get("agents.enabled").append("extra")
+    assert store.get_all()["agents.enabled"] == ["claude", "codex", "kimi"]
+    assert DEFAULTS["agents.enabled"] == ["claude", "codex", "kimi"]
+
+
+def test_get_does_not_share_cached_containers(tmp_path):
+    store = SettingsStore(tmp_path / "test.db")
+    store.set("agents.enabled", ["claude"])
+    store.get("agents.enabled").append("codex")
+    assert store.get("agents.enabled") == ["claude"]
+
+
+def test_values_are_stored_as_blobs_and_text_rows_still_load(tmp_path):
+    store = SettingsStore(tmp_path / "test.db")
+    store.set("timeouts.idle", 900)
+    with store._lock:
+        kind = store._conn.execute("SELECT typeof(value) FROM settings WHERE key = 'timeouts.idle'").fetchone()[0]
+        store._conn.execute("INSERT INTO settings (key, value) VALUES ('timeouts.parse', '60')")
+        store._conn.commit()
+    store.delete("missing")  # drop the cached rows
+    assert kind == "blob"
+    assert store.get("timeouts.parse") == 60
+
+
 def test_get_effective_with_session_override(tmp_path):
     store = SettingsStore(tmp_path / "test.db")
     store.set("timeouts.idle", 3600)
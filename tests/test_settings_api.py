@@ -110,6 +110,22 @@ def test_create_session_rejects_unknown_config_key(client):
     assert "Unknown settings keys" in resp.json()["detail"]
 
 
+def test_ws_connected_reflects_model_setting_changes(client):
+    with client.websocket_connect("/ws") as ws:
+        hello = ws.receive_json()
+    assert {a["name"]: a["model"] for a in hello["agents"]}["claude"] is None
+
+    client.put("/api/settings/agents.claude.model", json={"value": "opus"})
+    with client.websocket_connect("/ws") as ws:
+        hello = ws.receive_json()
+    assert {a["name"]: a["model"] for a in hello["agents"]}["claude"] == "opus"
+
+    client.delete("/api/settings/agents.claude.model")
+    with client.websocket_connect("/ws") as ws:
+        hello = ws.receive_json()
+    assert {a["name"]: a["model"] for a in hello["agents"]}["claude"] is None
+
+
 def test_ws_create_session_persists_config(client):
     with client.websocket_connect("/ws") as ws:
         msg = ws.receive_json()
@@ -232,3 +248,52 @@ def test_ws_running_message_not_double_broadcast(monkeypatch, tmp_path):
         call.get("type") == "user_message" and call.get("text") == "hello while running"
         for call in FakeRunner.last_instance.broadcast_calls
     )
+
+
+def test_ws_session_scoped_messages_require_session(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.receive_json()
+        ws.send_json({"type": "card_start", "card_id": "abc"})
+        assert ws.receive_json() == {"type": "error", "message": "No session"}
+        ws.send_json({"type": "create_session"})
+        assert ws.receive_json()["type"] == "session_created"
+        ws.send_json({"type": "card_update", "card_id": ""})
+        assert ws.receive_json() == {"type": "error", "message": "Missing card_id"}
+
+
+def test_ws_handler_error_keeps_connection_usable(monkeypatch, tmp_path):
+    db_path = tmp_path / "test.db"
+    session_store = SessionStore(db_path)
+    app = create_app(session_store=session_store, settings_store=SettingsStore(db_path))
+    client = TestClient(app)
+
+    def boom(session_id):
+        raise RuntimeError("db unavailable")
+
+    monkeypatch.setattr(session_store, "get_session", boom)
+    with client.websocket_connect("/ws") as ws:
+        ws.receive_json()
+        ws.send_json({"type": "join_session", "session_id": "abc"})
+        assert ws.receive_json() == {"type": "error", "message": "Internal error"}
+        ws.send_json({"type": "create_session"})
+        assert ws.receive_json()["type"] == "session_created"
+
+
+def test_ws_card_update_passes_fields_in_message_order(monkeypatch, client):
+    from src.server.runner import SessionRunner
+
+    seen: list[list[str]] = []
+
+    async def record_update(self, session_id, card_id, **fields):
+        seen.append(list(fields))
+        raise ValueError("stop")
+
+    monkeypatch.setattr(SessionRunner, "update_card", record_update)
+    keys = ["title", "description", "planner", "implementer", "reviewer", "status"]
+    with client.websocket_connect("/ws") as ws:
+        ws.receive_json()
+        ws.send_json({"type": "create_session"})
+        assert ws.receive_json()["type"] == "session_created"
+        ws.send_json({"type": "card_update", "card_id": "c1", **{k: k for k in keys}, "coordinator": None})
+        assert ws.receive_json() == {"type": "error", "message": "stop"}
+    assert seen == [keys]
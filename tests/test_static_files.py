@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+
+from src.server.app import create_app
+from src.server.sessions import SessionStore
+
+
+def _client(tmp_path, monkeypatch):
+    static = tmp_path / "dist"
+    (static / "assets").mkdir(parents=True)
+    (static / "index.html").write_text("<html>app</html>")
+    (static / "assets" / "app-1234.js").write_text("console.log(1)")
+    monkeypatch.setenv("STATIC_DIR", str(static))
+    return TestClient(create_app(session_store=SessionStore(tmp_path / "test.db")))
+
+
+def test_static_assets_are_immutable_and_revalidate(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    resp = client.get("/assets/app-1234.js")
+    assert resp.status_code == 200
+    assert resp.text == "console.log(1)"
+    assert "immutable" in resp.headers["cache-control"]
+
+    again = client.get("/assets/app-1234.js", headers={"If-None-Match": resp.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_static_unknown_paths_fall_back_to_index(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    resp = client.get("/sessions/abc")
+    assert resp.status_code == 200
+    assert resp.text == "<html>app</html>"
+    assert resp.headers["cache-control"] == "no-cache"
+    assert client.get("/").text == "<html>app</html>"
+    assert client.get("/../pyproject.toml").text == "<html>app</html>"
+
+
+def test_unknown_asset_paths_serve_index_without_immutable_caching(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    resp = client.get("/assets/app-stale.js")
+    assert resp.text == "<html>app</html>"
+    assert resp.headers["cache-control"] == "no-cache"
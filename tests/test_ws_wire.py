@@ -0,0 +1,63 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.server.app import create_app
+from src.server.sessions import SessionStore
+from src.server.settings import SettingsStore
+
+msgpack = pytest.importorskip("msgpack")
+
+
+@pytest.fixture
+def client(tmp_path):
+    db_path = tmp_path / "test.db"
+    app = create_app(session_store=SessionStore(db_path), settings_store=SettingsStore(db_path))
+    return TestClient(app)
+
+
+def test_ws_defaults_to_json_without_subprotocol(client):
+    with client.websocket_connect("/ws") as ws:
+        assert ws.accepted_subprotocol is None
+        assert ws.receive_json()["type"] == "connected"
+
+
+def test_ws_msgpack_subprotocol_round_trip(client):
+    with client.websocket_connect("/ws", subprotocols=["msgpack", "json"]) as ws:
+        assert ws.accepted_subprotocol == "msgpack"
+        hello = msgpack.unpackb(ws.receive_bytes(), raw=False)
+        assert hello["type"] == "connected"
+
+        ws.send_bytes(msgpack.packb({"type": "create_session"}, use_bin_type=True))
+        created = msgpack.unpackb(ws.receive_bytes(), raw=False)
+        assert created["type"] == "session_created"
+
+        ws.send_bytes(msgpack.packb({"type": "card_create", "title": "Wire"}, use_bin_type=True))
+        event = msgpack.unpackb(ws.receive_bytes(), raw=False)
+        assert event["type"] == "card_created"
+        assert isinstance(event["event_id"], int)
+
+
+def test_ws_rejects_binary_frames_on_json_connection(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.receive_json()
+        ws.send_bytes(msgpack.packb({"type": "create_session"}, use_bin_type=True))
+        err = ws.receive_json()
+        assert err["type"] == "error"
+        assert "msgpack" in err["message"]
+
+
+def test_ws_invalid_msgpack_reports_error(client):
+    with client.websocket_connect("/ws", subprotocols=["msgpack"]) as ws:
+        ws.receive_bytes()
+        ws.send_bytes(b"\xc1")
+        err = msgpack.unpackb(ws.receive_bytes(), raw=False)
+        assert err == {"type": "error", "message": "Invalid MessagePack"}
+
+
+def test_msgpack_batch_encoding_matches_packb():
+    from src.server.wire import Frame, encode_msgpack_batch
+
+    for n in (2, 15, 16, 32):
+        events = [{"type": "agent_stream", "seq": i} for i in range(n)]
+        encoded = encode_msgpack_batch([Frame(e) for e in events])
+        assert msgpack.unpackb(encoded, raw=False) == {"type": "batch", "events": events}
@@ -30,9 +30,18 @@ const MAX_RECONNECT_DELAY_MS = 30_000;
 const MAX_RECONNECT_ATTEMPTS = 10;
 const RECONNECT_JITTER_RATIO = 0.2;
 
+type BatchMessage = { type: "batch"; events: ServerMessage[] };
+
+// Live events carry epoch-ms timestamps; persisted messages use ISO strings.
+function toIsoTimestamp(value: string | number | undefined): string {
+  if (value === undefined) return new Date().toISOString();
+  return typeof value === "number" ? new Date(value).toISOString() : value;
+}
+
 function getWsUrl(): string {
   const proto = window.location.protocol === "https:" ? "wss:" : "ws:";
-  return `${proto}//${window.location.host}/ws`;
+  // batch=1: the server may wrap a burst of queued events in one "batch" frame
+  return `${proto}//${window.location.host}/ws?batch=1`;
 }
 
 type Action =
@@ -157,7 +166,7 @@ function reducer(state: AppState, action: Action): AppState {
     case "user_message": {
       const userMsg: Message = {
         id: crypto.randomUUID(), role: "user", content: msg.text,
-        round_number: null, passed: false, created_at: msg.created_at ?? new Date().toISOString(),
+        round_number: null, passed: false, created_at: toIsoTimestamp(msg.created_at),
       };
       return { ...state, messages: [...state.messages, userMsg] };
     }
@@ -194,7 +203,7 @@ function reducer(state: AppState, action: Action): AppState {
     case "agent_notice": {
       const noticeMsg: Message = {
         id: crypto.randomUUID(), role: "system", content: `[${msg.agent}] ${msg.message}`,
-        round_number: state.currentRound || null, passed: false, created_at: msg.created_at ?? new Date().toISOString(),
+        round_number: state.currentRound || null, passed: false, created_at: toIsoTimestamp(msg.created_at),
       };
       return { ...state, messages: [...state.messages, noticeMsg] };
     }
@@ -210,7 +219,7 @@ function reducer(state: AppState, action: Action): AppState {
       if (stderr) delete nextPending[stderrKey];
       const agentMsg: Message = {
         id: crypto.randomUUID(), role: msg.agent, content,
-        round_number: state.currentRound, passed: msg.passed, created_at: msg.created_at ?? new Date().toISOString(),
+        round_number: state.currentRound, passed: msg.passed, created_at: toIsoTimestamp(msg.created_at),
         latency_ms: msg.latency_ms,
         stream_chunks: state.agentStreamCounts[msg.agent] ?? 0,
         stderr,
@@ -260,7 +269,7 @@ function reducer(state: AppState, action: Action): AppState {
         content,
         round_number: msg.round,
         passed: false,
-        created_at: msg.created_at ?? new Date().toISOString(),
+        created_at: toIsoTimestamp(msg.created_at),
         interrupted: true,
       };
       return {
@@ -279,7 +288,7 @@ function reducer(state: AppState, action: Action): AppState {
         content: msg.text,
         round_number: msg.round,
         passed: false,
-        created_at: msg.created_at ?? new Date().toISOString(),
+        created_at: toIsoTimestamp(msg.created_at),
       };
       return { ...state, messages: [...state.messages, dmMsg] };
     }
@@ -325,7 +334,7 @@ function reducer(state: AppState, action: Action): AppState {
           tool_input: msg.tool_input,
           description: msg.description,
           round: msg.round,
-          created_at: msg.created_at ?? new Date().toISOString(),
+          created_at: toIsoTimestamp(msg.created_at),
         }],
       };
 
@@ -434,9 +443,8 @@ export function useWebSocket(onSendFailure?: (msgType: string) => void) {
           ws.send(JSON.stringify({ type: "join_session", session_id: sid, last_event_id: lastEventId }));
         }
       };
-      ws.onmessage = (event) => {
-        if (!alive) return;
-        let msg: ServerMessage = JSON.parse(event.data);
+      const handleServerMessage = (incoming: ServerMessage) => {
+        let msg = incoming;
         if (msg.type === "session_joined" && pendingReplay.current) {
           msg = { ...msg, in_flight: null };
           pendingReplay.current = false;
@@ -461,6 +469,15 @@ export function useWebSocket(onSendFailure?: (msgType: string) => void) {
           }
         }
       };
+      ws.onmessage = (event) => {
+        if (!alive) return;
+        const data: ServerMessage | BatchMessage = JSON.parse(event.data);
+        if (data.type === "batch") {
+          for (const msg of data.events) handleServerMessage(msg);
+        } else {
+          handleServerMessage(data);
+        }
+      };
       ws.onerror = () => {
         if (!alive) return;
         ws.close();
@@ -161,12 +161,12 @@ export type ServerMessage = ServerEnvelope & (
   | { type: "agent_added"; name: string; agent_type: string; role: string; model?: string | null }
   | { type: "agent_removed"; name: string }
   | { type: "title_changed"; title: string }
-  | { type: "user_message"; text: string; created_at?: string }
+  | { type: "user_message"; text: string; created_at?: string | number }
   | { type: "round_started"; round: number; agents: string[] }
   | { type: "agent_stream"; agent: string; chunk: string; round?: number }
   | { type: "agent_stderr"; agent: string; text: string; round?: number }
-  | { type: "agent_completed"; agent: string; text: string; passed: boolean; success: boolean; latency_ms: number; stopped?: boolean; round?: number; created_at?: string }
-  | { type: "agent_notice"; agent: string; message: string; created_at?: string }
+  | { type: "agent_completed"; agent: string; text: string; passed: boolean; success: boolean; latency_ms: number; stopped?: boolean; round?: number; created_at?: string | number }
+  | { type: "agent_notice"; agent: string; message: string; created_at?: string | number }
   | { type: "round_ended"; round: number; all_passed: boolean }
   | { type: "paused"; round: number }
   | { type: "discussion_ended"; reason: string }
@@ -176,11 +176,11 @@ export type ServerMessage = ServerEnvelope & (
   | { type: "card_deleted"; card_id: string }
   | { type: "card_phase_started"; card_id: string; phase: CardStatus; agent: string }
   | { type: "card_phase_completed"; card_id: string; phase: CardStatus; agent: string; approved?: boolean; next_phase?: CardStatus }
-  | { type: "agent_interrupted"; agent: string; round: number; partial_text: string; created_at?: string }
-  | { type: "dm_sent"; agent: string; text: string; round: number; created_at?: string }
+  | { type: "agent_interrupted"; agent: string; round: number; partial_text: string; created_at?: string | number }
+  | { type: "dm_sent"; agent: string; text: string; round: number; created_at?: string | number }
   | { type: "agent_prompt"; agent: string; round: number; sections: Record<string, string> }
-  | { type: "delivery_acked"; delivery_id: string; recipient: string; sender: string; round?: number; created_at?: string }
-  | { type: "permission_request"; agent: string; round: number; request_id: string; tool_name: string; tool_input: Record<string, unknown>; description: string; created_at?: string }
+  | { type: "delivery_acked"; delivery_id: string; recipient: string; sender: string; round?: number; created_at?: string | number }
+  | { type: "permission_request"; agent: string; round: number; request_id: string; tool_name: string; tool_input: Record<string, unknown>; description: string; created_at?: string | number }
 );
 
 export type ClientMessage =